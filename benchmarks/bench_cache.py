@@ -0,0 +1,58 @@
+"""
+Cost of a call to a `ttl_lru_cache` function on a hit and on a miss, next to
+`functools.lru_cache` and to the bare function.
+
+Misses cycle over more keys than the cache holds, so every call evicts an entry.
+
+Usage:
+    python -m benchmarks.bench_cache [--calls 100000] [--rounds 5]
+"""
+
+import functools
+import time
+from typing import Callable, Dict
+
+from benchmarks.run import bench_main, best_of
+from fastapi_utilities import ttl_lru_cache
+
+MAX_SIZE = 128
+
+
+def compute(x: int) -> int:
+    return x * 2
+
+
+def caches() -> Dict[str, Callable[[int], int]]:
+    return {
+        "bare function": compute,
+        "functools.lru_cache": functools.lru_cache(maxsize=MAX_SIZE)(compute),
+        "ttl_lru_cache": ttl_lru_cache(ttl=3600, max_size=MAX_SIZE)(compute),
+    }
+
+
+def bench_calls(func: Callable[[int], int], keys: int, calls: int) -> float:
+    """
+    Call `func` `calls` times cycling over `keys` keys, and return the mean time in µs.
+    """
+    for key in range(keys):
+        func(key)
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i % keys)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def run(calls: int = 100000, rounds: int = 5) -> Dict[str, float]:
+    """
+    Return the best time per call in µs of every function on hits and misses, over
+    `rounds` interleaved rounds.
+    """
+    benches = {}
+    for name, func in caches().items():
+        for kind, keys in (("hit", MAX_SIZE // 2), ("miss", MAX_SIZE * 2)):
+            benches[f"{name} {kind}"] = functools.partial(bench_calls, func, keys, calls)
+    return best_of(rounds, benches)
+
+
+if __name__ == "__main__":
+    bench_main("cache", run, __doc__)
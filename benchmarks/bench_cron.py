@@ -0,0 +1,63 @@
+"""
+Cost of computing the next run of many cron jobs: `get_delta`, which parses the
+expression and reads the clock again on every tick, next to a `CronSchedule` compiled
+once and advancing from its last fire time, and to `next_fire_times`.
+
+Usage:
+    python -m benchmarks.bench_cron [--jobs 1000] [--ticks 10] [--rounds 5]
+"""
+
+import functools
+import time
+from typing import Dict
+
+from benchmarks.run import bench_main, best_of
+from fastapi_utilities.repeat import CronSchedule
+from fastapi_utilities.repeat.repeat_at import get_delta
+
+
+def expressions(jobs: int):
+    return [f"{i % 60} {i % 24} * * {i % 7}" for i in range(jobs)]
+
+
+def bench_get_delta(crons, ticks: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for cron in crons:
+            get_delta(cron)
+    return (time.perf_counter() - start) / (ticks * len(crons)) * 1e6
+
+
+def bench_schedule(crons, ticks: int) -> float:
+    schedules = [CronSchedule(cron) for cron in crons]
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for schedule in schedules:
+            schedule.next_fire()
+    return (time.perf_counter() - start) / (ticks * len(crons)) * 1e6
+
+
+def bench_next_fire_times(count: int) -> float:
+    schedule = CronSchedule("*/5 * * * *")
+    start = time.perf_counter()
+    schedule.next_fire_times(count)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def run(jobs: int = 1000, ticks: int = 10, rounds: int = 5) -> Dict[str, float]:
+    """
+    Return the best time in µs of each way to compute a fire time, over `rounds` rounds.
+    """
+    crons = expressions(jobs)
+    return best_of(
+        rounds,
+        {
+            "get_delta": functools.partial(bench_get_delta, crons, ticks),
+            "CronSchedule": functools.partial(bench_schedule, crons, ticks),
+            "next_fire_times": functools.partial(bench_next_fire_times, jobs * ticks),
+        },
+    )
+
+
+if __name__ == "__main__":
+    bench_main("cron", run, __doc__)
@@ -0,0 +1,133 @@
+"""
+Wake-up accuracy and CPU use of many jobs run by a `Scheduler`, next to the same jobs
+run by `repeat_every` and `repeat_at` loops of their own.
+
+Half of the jobs run every few hundred milliseconds at a fixed rate, the other half on
+cron expressions that do not fire during the benchmark, so they only cost their sleep.
+The lateness of a run is how long after its slot on the fixed-rate grid of its job it
+started, the earliest run of the job being taken as on time; the CPU use is the process
+time spent per second of wall time, in percent of one core.
+
+Usage:
+    python -m benchmarks.bench_scheduler [--jobs 1000] [--duration 3] [--rounds 3]
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.run import bench_main, best_of
+from fastapi_utilities import repeat_at, repeat_every
+from fastapi_utilities.repeat import Scheduler
+
+
+def interval(i: int) -> float:
+    # Distinct intervals, so that runs do not keep coming due at the same time.
+    return 0.2 + (i % 1000) * 0.0002
+
+
+def cron_expression(i: int) -> str:
+    return f"{i % 60} {i % 24} 1 1 *"
+
+
+def recorder(runs: List[float]) -> Callable:
+    async def job():
+        runs.append(asyncio.get_running_loop().time())
+
+    return job
+
+
+def idle() -> None:
+    pass
+
+
+def lateness(runs: List[List[float]]) -> List[float]:
+    """
+    Return the lateness in ms of every run but the first of each job, which all start at
+    once, relative to the grid of its job anchored at its earliest run.
+    """
+    late = []
+    for i, job_runs in enumerate(runs):
+        offsets = [run - k * interval(i) for k, run in enumerate(job_runs) if k > 0]
+        if offsets:
+            anchor = min(offsets)
+            late.extend((offset - anchor) * 1000 for offset in offsets)
+    return late
+
+
+async def measure(start_jobs: Callable, jobs: int, duration: float) -> Dict[str, float]:
+    runs: List[List[float]] = [[] for _ in range(jobs)]
+    started = time.perf_counter()
+    stop = await start_jobs(runs)
+    start_ms = (time.perf_counter() - started) * 1000
+    tasks = len(asyncio.all_tasks())
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    await asyncio.sleep(duration)
+    cpu_percent = (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+    await stop()
+
+    late = sorted(lateness(runs))
+    return {
+        "start ms": start_ms,
+        "tasks": tasks,
+        "cpu %": cpu_percent,
+        "lateness p50 ms": statistics.median(late) if late else float("nan"),
+        "lateness p99 ms": late[int(len(late) * 0.99)] if late else float("nan"),
+    }
+
+
+async def bench_scheduler(jobs: int, duration: float) -> Dict[str, float]:
+    async def start_jobs(runs: List[List[float]]):
+        scheduler = Scheduler()
+        for i in range(jobs):
+            if i % 2 == 0:
+                scheduler.add_job(
+                    recorder(runs[i]), seconds=interval(i), fixed_rate=True, name=f"every-{i}"
+                )
+            else:
+                scheduler.add_job(idle, cron=cron_expression(i), name=f"at-{i}")
+        scheduler.start()
+        return scheduler.shutdown
+
+    return await measure(start_jobs, jobs, duration)
+
+
+async def bench_loops(jobs: int, duration: float) -> Dict[str, float]:
+    async def start_jobs(runs: List[List[float]]):
+        before = asyncio.all_tasks()
+        for i in range(jobs):
+            if i % 2 == 0:
+                await repeat_every(seconds=interval(i), fixed_rate=True)(recorder(runs[i]))()
+            else:
+                repeat_at(cron=cron_expression(i))(idle)()
+
+        async def stop():
+            loops = asyncio.all_tasks() - before
+            for task in loops:
+                task.cancel()
+            await asyncio.gather(*loops, return_exceptions=True)
+
+        return stop
+
+    return await measure(start_jobs, jobs, duration)
+
+
+def run(jobs: int = 1000, duration: float = 3, rounds: int = 3) -> Dict[str, float]:
+    """
+    Return the best results of both ways to run `jobs` jobs for `duration` seconds, over
+    `rounds` interleaved rounds.
+    """
+    return best_of(
+        rounds,
+        {
+            "Scheduler": lambda: asyncio.run(bench_scheduler(jobs, duration)),
+            "decorator loops": lambda: asyncio.run(bench_loops(jobs, duration)),
+        },
+    )
+
+
+if __name__ == "__main__":
+    bench_main("scheduler", run, __doc__)
@@ -0,0 +1,74 @@
+"""
+Cost of opening, committing and closing a session with `FastAPISessionMaker.context_session`
+on SQLite, next to a plain SQLAlchemy `Session`.
+
+Each session runs `SELECT 1`, so a connection is checked out of the pool every time.
+
+Usage:
+    python -m benchmarks.bench_session [--sessions 5000] [--rounds 5]
+"""
+
+import functools
+import os
+import tempfile
+import time
+from typing import Dict
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from benchmarks.run import bench_main, best_of
+from fastapi_utilities import FastAPISessionMaker
+
+SELECT_ONE = text("SELECT 1")
+
+
+def bench_plain_session(engine, sessions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(sessions):
+        session = Session(bind=engine, autoflush=False)
+        try:
+            session.execute(SELECT_ONE)
+            session.commit()
+        finally:
+            session.close()
+    return (time.perf_counter() - start) / sessions * 1e6
+
+
+def bench_context_session(session_maker: FastAPISessionMaker, sessions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(sessions):
+        with session_maker.context_session() as session:
+            session.execute(SELECT_ONE)
+    return (time.perf_counter() - start) / sessions * 1e6
+
+
+def run(sessions: int = 5000, rounds: int = 5) -> Dict[str, float]:
+    """
+    Return the best time per session in µs of both ways, over `rounds` interleaved rounds,
+    on a temporary SQLite database file.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        db_url = f"sqlite:///{os.path.join(directory, 'bench.sqlite3')}"
+        engine = create_engine(db_url)
+        session_maker = FastAPISessionMaker(db_url)
+        # Create the engines and open the pooled connections before timing.
+        session_maker.warm_up()
+        bench_plain_session(engine, 10)
+
+        results = best_of(
+            rounds,
+            {
+                "Session": functools.partial(bench_plain_session, engine, sessions),
+                "context_session": functools.partial(
+                    bench_context_session, session_maker, sessions
+                ),
+            },
+        )
+        engine.dispose()
+        session_maker.reset_session()
+    return results
+
+
+if __name__ == "__main__":
+    bench_main("session", run, __doc__, baseline="Session")
@@ -0,0 +1,111 @@
+"""
+Per-request overhead of the timer middleware, next to a bare app and to the previous
+`@app.middleware("http")` (BaseHTTPMiddleware) implementation.
+
+Requests are sent straight to the ASGI app, without a server or an HTTP client, so the
+numbers only contain the app and middleware cost.
+
+Usage:
+    python -m benchmarks.bench_timer_middleware [--requests 5000] [--rounds 5]
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from fastapi import FastAPI, Request
+
+from benchmarks.run import bench_main, best_of
+from fastapi_utilities import add_timer_middleware
+
+logging.getLogger("uvicorn").setLevel(logging.WARNING)
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    return app
+
+
+def add_base_http_timer_middleware(app: FastAPI) -> None:
+    """
+    The timer middleware as it was implemented before, on top of BaseHTTPMiddleware.
+    """
+    logger = logging.getLogger("uvicorn")
+
+    @app.middleware("http")
+    async def timer_middleware(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = (time.time() - start_time) * 1000
+        logger.info(
+            f'(fastapi-utilities) "{request.method} - {request.url.path}" :: Time Taken :: {process_time:.2f} ms'
+        )
+        return response
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    """
+    Send `requests` GET requests to the app and return the mean time per request in µs.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/1",
+        "raw_path": b"/items/1",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(min(requests, 500)):
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def run(requests: int = 5000, rounds: int = 5) -> Dict[str, float]:
+    """
+    Return the best time per request in µs of every app, over `rounds` interleaved rounds.
+    """
+    bare = make_app()
+    base_http = make_app()
+    add_base_http_timer_middleware(base_http)
+    asgi = make_app()
+    add_timer_middleware(asgi)
+    sampled = make_app()
+    add_timer_middleware(sampled, log_every=100)
+
+    apps = {
+        "bare app": bare,
+        "BaseHTTPMiddleware timer": base_http,
+        "ASGI timer": asgi,
+        "ASGI timer, log_every=100": sampled,
+    }
+    return best_of(
+        rounds,
+        {name: (lambda app=app: asyncio.run(drive(app, requests))) for name, app in apps.items()},
+    )
+
+
+if __name__ == "__main__":
+    bench_main("timer_middleware", run, __doc__, baseline="bare app")
@@ -1,8 +1,27 @@
-from .repeat.repeat_every import repeat_every
-from .repeat.repeat_at import repeat_at
+import typing
 
-from .timer import add_timer_middleware
+from ._lazy import lazy_exports
 
-from .session import FastAPISessionMaker
+# The public names, imported from their submodule on first use so that e.g. using
+# `ttl_lru_cache` does not import SQLAlchemy, croniter or FastAPI.
+_EXPORTS = {
+    "repeat_every": ".repeat",
+    "repeat_at": ".repeat",
+    "Scheduler": ".repeat",
+    "batch_every": ".repeat",
+    "add_timer_middleware": ".timer",
+    "FastAPISessionMaker": ".session",
+    "AsyncFastAPISessionMaker": ".session",
+    "ttl_lru_cache": ".cache",
+    "add_cache_middleware": ".cache",
+}
 
-from .cache import ttl_lru_cache
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if typing.TYPE_CHECKING:
+    from .repeat import repeat_every, repeat_at, Scheduler, batch_every
+    from .timer import add_timer_middleware
+    from .session import FastAPISessionMaker, AsyncFastAPISessionMaker
+    from .cache import ttl_lru_cache, add_cache_middleware
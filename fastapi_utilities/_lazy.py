@@ -0,0 +1,28 @@
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(
+    package: str, exports: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Return the module `__getattr__` and `__dir__` of `package`, which import each name in
+    `exports` from its submodule (e.g. ".session") the first time it is accessed, so that
+    importing the package does not import the dependencies of all its submodules.
+    """
+    module = sys.modules[package]
+
+    def __getattr__(name: str) -> Any:
+        submodule = exports.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(submodule, package), name)
+        # Later accesses find the name directly, without calling __getattr__.
+        setattr(module, name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(module)) | set(exports))
+
+    return __getattr__, __dir__
@@ -1 +1,17 @@
+import typing
+
+from .._lazy import lazy_exports
 from .ttl_lru_cache import ttl_lru_cache
+from .base import CacheBackend, CacheEntry, CacheInfo
+from .ttl_cache import TTLCache
+from .backends import SQLiteBackend, SharedMemoryBackend
+from .size import estimate_size
+
+# The middleware imports FastAPI, so it is only imported when used.
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {"CacheMiddleware": ".middleware", "add_cache_middleware": ".middleware"},
+)
+
+if typing.TYPE_CHECKING:
+    from .middleware import CacheMiddleware, add_cache_middleware
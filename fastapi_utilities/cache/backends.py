@@ -0,0 +1,233 @@
+import getpass
+import os
+import pickle
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+from .base import CacheBackend, CacheEntry, StatsHook
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key BLOB PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    stale_until REAL NOT NULL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS cache_entries_stale_until ON cache_entries (stale_until)"
+
+
+def _check_owner(path: str) -> None:
+    """
+    Refuse a file or directory that is a symlink or belongs to another user, since the
+    entries read from it are unpickled.
+    """
+    if not hasattr(os, "geteuid"):
+        return
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode) or info.st_uid != os.geteuid():
+        raise PermissionError(f"{path} must belong to the current user and not be a symlink")
+
+
+def _create_private_file(path: str) -> None:
+    """
+    Create `path` readable and writable by the current user only, if it does not exist,
+    and check that it belongs to the current user.
+    """
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+    except FileExistsError:
+        pass
+    _check_owner(path)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    A `ttl_lru_cache` backend that stores entries in a local SQLite database.
+
+    Keys and values are serialized with pickle, so they must be picklable. The database
+    runs in WAL mode, which lets every worker process on the host read and write the same
+    file concurrently: a value computed in one worker is reused by all of them.
+
+    Once `max_size` is exceeded, the entries closest to expiry are evicted first. Unlike
+    the in-process `TTLCache`, lookups do not write to the database to track recency.
+    Expired entries are dropped when they are looked up, and all at once every
+    `expire_interval` seconds when a value is stored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: Optional[int] = 10000,
+        stats_hook: Optional[StatsHook] = None,
+        timeout: float = 5.0,
+        expire_interval: float = 60.0,
+    ):
+        """
+        `path` is the database file, created readable by the current user only if it does
+        not exist. A file that belongs to another user is refused, since its entries are
+        unpickled. `timeout` is how long to wait, in seconds, for another process to
+        release a write lock. `max_size` None means unbounded.
+        """
+        super().__init__(stats_hook=stats_hook)
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.expire_interval = expire_interval
+        self._next_expire = time.monotonic() + expire_interval
+        self._local = threading.local()
+        _create_private_file(path)
+        with self._connection() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute(_INDEX)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return the connection of the current thread, opening a new one after a fork.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _dumps(obj: Any) -> bytes:
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        conn = self._connection()
+        raw_key = self._dumps(key)
+        row = conn.execute(
+            "SELECT value, expires_at, stale_until FROM cache_entries WHERE key = ?",
+            (raw_key,),
+        ).fetchone()
+        entry = None
+        if row is not None:
+            value, expires_at, stale_until = row
+            if stale_until <= time.time():
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE key = ? AND stale_until <= ?",
+                    (raw_key, time.time()),
+                )
+                self._count("expiration")
+            else:
+                entry = CacheEntry(pickle.loads(value), expires_at, stale_until, len(value))
+        self._count("miss" if entry is None else "hit")
+        return entry
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        expires_at: float,
+        stale_until: Optional[float] = None,
+    ) -> None:
+        if stale_until is None or stale_until < expires_at:
+            stale_until = expires_at
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)",
+            (self._dumps(key), self._dumps(value), expires_at, stale_until),
+        )
+        if self.max_size is not None:
+            evicted = conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                " SELECT key FROM cache_entries ORDER BY stale_until"
+                " LIMIT max(0, (SELECT count(*) FROM cache_entries) - ?))",
+                (self.max_size,),
+            ).rowcount
+            for _ in range(evicted):
+                self._count("eviction")
+        if time.monotonic() >= self._next_expire:
+            self._next_expire = time.monotonic() + self.expire_interval
+            self.expire()
+
+    def pop(self, key: Hashable) -> Optional[CacheEntry]:
+        conn = self._connection()
+        raw_key = self._dumps(key)
+        row = conn.execute(
+            "SELECT value, expires_at, stale_until FROM cache_entries WHERE key = ?",
+            (raw_key,),
+        ).fetchone()
+        conn.execute("DELETE FROM cache_entries WHERE key = ?", (raw_key,))
+        if row is None:
+            return None
+        value, expires_at, stale_until = row
+        return CacheEntry(pickle.loads(value), expires_at, stale_until, len(value))
+
+    def expire(self) -> int:
+        """
+        Drop every entry past `stale_until` and return how many were dropped.
+        """
+        expired = (
+            self._connection()
+            .execute("DELETE FROM cache_entries WHERE stale_until <= ?", (time.time(),))
+            .rowcount
+        )
+        for _ in range(expired):
+            self._count("expiration")
+        return expired
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache_entries")
+        self._reset_stats()
+
+    def memory_usage(self) -> int:
+        (size,) = (
+            self._connection()
+            .execute("SELECT coalesce(sum(length(value)), 0) FROM cache_entries")
+            .fetchone()
+        )
+        return size
+
+    def __len__(self) -> int:
+        (count,) = self._connection().execute("SELECT count(*) FROM cache_entries").fetchone()
+        return count
+
+
+class SharedMemoryBackend(SQLiteBackend):
+    """
+    A `SQLiteBackend` kept in shared memory, for sharing a cache between the worker
+    processes of a single host without touching the disk.
+
+    The database lives in a directory private to the current user (mode 0700) within
+    `directory`, by default `/dev/shm` (a RAM-backed filesystem on Linux) or the temporary
+    directory where that does not exist. All processes of the user that use the same
+    `name` share the same entries.
+    """
+
+    def __init__(
+        self,
+        name: str = "fastapi-utilities-cache",
+        max_size: Optional[int] = 10000,
+        stats_hook: Optional[StatsHook] = None,
+        timeout: float = 5.0,
+        expire_interval: float = 60.0,
+        directory: Optional[str] = None,
+    ):
+        if directory is None:
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        user = os.geteuid() if hasattr(os, "geteuid") else getpass.getuser()
+        private_directory = os.path.join(directory, f"fastapi-utilities-{user}")
+        try:
+            os.mkdir(private_directory, 0o700)
+        except FileExistsError:
+            pass
+        # Another user could otherwise create the database, or its WAL files, beforehand.
+        _check_owner(private_directory)
+        os.chmod(private_directory, 0o700)
+        super().__init__(
+            os.path.join(private_directory, f"{name}.sqlite3"),
+            max_size=max_size,
+            stats_hook=stats_hook,
+            timeout=timeout,
+            expire_interval=expire_interval,
+        )
@@ -0,0 +1,159 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+StatsHook = Callable[[str, float], None]
+
+_EVENTS = ("hit", "miss", "expiration", "eviction", "load", "refresh_error")
+
+
+class CacheEntry(NamedTuple):
+    """
+    A cached value along with the (epoch) time at which it expires, and the time until
+    which it may still be served stale.
+    """
+
+    value: Any
+    expires_at: float
+    stale_until: float
+    size: int = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+class CacheInfo(NamedTuple):
+    """
+    Statistics of a cache backend, in the spirit of `functools.lru_cache().cache_info()`.
+
+    `memory` is the estimated size of the cached values in bytes (0 if the backend does
+    not size them), `load_time` the total number of seconds spent in the `loads` calls
+    that computed them, and `refresh_errors` the number of background refreshes of stale
+    entries that failed.
+    """
+
+    hits: int
+    misses: int
+    expirations: int
+    evictions: int
+    maxsize: Optional[int]
+    currsize: int
+    memory: int
+    loads: int
+    load_time: float
+    refresh_errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def avg_load_time(self) -> float:
+        return self.load_time / self.loads if self.loads else 0.0
+
+
+class CacheBackend:
+    """
+    Base class for the storage behind `ttl_lru_cache`.
+
+    Subclasses implement `get`, `set`, `pop`, `clear`, `__len__` and `memory_usage`, and
+    call `_count` for every "hit", "miss", "expiration" and "eviction" so that `info`
+    and the optional `stats_hook` see them (a backend already holding a lock of its own
+    may update `_counts` under it instead). The hook is called as `stats_hook(event, value)`,
+    with the load time in seconds as value for "load" events and 1 otherwise.
+    """
+
+    max_size: Optional[int] = None
+
+    def __init__(self, stats_hook: Optional[StatsHook] = None):
+        self.stats_hook = stats_hook
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        with self._stats_lock:
+            self._counts: Dict[str, int] = dict.fromkeys(_EVENTS, 0)
+            self._load_time = 0.0
+
+    def _count(self, event: str, value: float = 1) -> None:
+        with self._stats_lock:
+            self._counts[event] += 1
+            if event == "load":
+                self._load_time += value
+        if self.stats_hook is not None:
+            self.stats_hook(event, value)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Return the entry stored under `key`, or None if it is missing or past `stale_until`.
+        The returned entry may be stale, check `entry.fresh`.
+        """
+        raise NotImplementedError
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        expires_at: float,
+        stale_until: Optional[float] = None,
+    ) -> None:
+        """
+        Store `value` under `key` until the epoch time `expires_at`, and keep it around as
+        a stale entry until `stale_until` (defaults to `expires_at`).
+        """
+        raise NotImplementedError
+
+    def pop(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Remove and return the entry stored under `key`, if any.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset the statistics.
+        """
+        raise NotImplementedError
+
+    def memory_usage(self) -> int:
+        """
+        Return the estimated size of the stored values, in bytes.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def record_load(self, seconds: float) -> None:
+        """
+        Record the time it took to compute a value that was (or will be) stored.
+        """
+        self._count("load", seconds)
+
+    def record_refresh_error(self) -> None:
+        """
+        Record that a background refresh of a stale entry failed.
+        """
+        self._count("refresh_error")
+
+    def info(self) -> CacheInfo:
+        """
+        Return the cache statistics.
+        """
+        with self._stats_lock:
+            counts = dict(self._counts)
+            load_time = self._load_time
+        return CacheInfo(
+            hits=counts["hit"],
+            misses=counts["miss"],
+            expirations=counts["expiration"],
+            evictions=counts["eviction"],
+            maxsize=self.max_size,
+            currsize=len(self),
+            memory=self.memory_usage(),
+            loads=counts["load"],
+            load_time=load_time,
+            refresh_errors=counts["refresh_error"],
+        )
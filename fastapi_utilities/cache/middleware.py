@@ -0,0 +1,331 @@
+import hashlib
+import time
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .base import CacheBackend, CacheEntry
+from .ttl_cache import TTLCache
+
+_NOT_MODIFIED_HEADERS = (b"cache-control", b"content-location", b"etag", b"expires", b"vary")
+_CREDENTIAL_HEADERS = ("authorization", "cookie")
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """
+    Parse a `Cache-Control` header into a dict of lowercased directives.
+    """
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def _response_cache_control(headers: List[Tuple[bytes, bytes]]) -> Dict[str, Optional[str]]:
+    return _parse_cache_control(
+        ", ".join(
+            value.decode("latin-1") for name, value in headers if name.lower() == b"cache-control"
+        )
+    )
+
+
+def _shared(cache_control: Dict[str, Optional[str]]) -> bool:
+    """
+    Whether a response may be served to other users than the one who requested it.
+    """
+    return "public" in cache_control or "s-maxage" in cache_control
+
+
+def _vary_names(headers: List[Tuple[bytes, bytes]]) -> List[str]:
+    """
+    Return the lowercased names of the request headers listed in the `Vary` headers.
+    """
+    names = []
+    for name, value in headers:
+        if name.lower() == b"vary":
+            names.extend(
+                part.strip().lower() for part in value.decode("latin-1").split(",") if part.strip()
+            )
+    return names
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an `If-None-Match` header against an ETag.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class CacheMiddleware:
+    """
+    An ASGI middleware that caches full responses to GET requests.
+
+    Responses are stored in a `CacheBackend` (by default an in-process `TTLCache`) under
+    the request path, query string and the values of the `vary_headers`, and are served
+    from there without calling the endpoint until they expire. HEAD requests are served
+    from cached GET responses.
+
+    Only complete `200` responses up to `max_body_size` bytes are cached, and only if they
+    do not set cookies, `Vary: *` or `Cache-Control: no-store / private / no-cache`. A
+    response's `Cache-Control: s-maxage / max-age` takes precedence over `ttl`. Requests
+    sent with `Cache-Control: no-store` bypass the cache, and `no-cache` forces a fresh
+    response.
+
+    Responses to requests with an `Authorization` or `Cookie` header that is not one of
+    the `vary_headers` are only cached, and served, if they are explicitly shareable with
+    `Cache-Control: public` or `s-maxage`, so that one user's response is never served to
+    another. A cached response is only served to requests with the same values of the
+    headers named in its `Vary` header.
+
+    Cached responses get an `ETag` (a hash of the body, unless the endpoint set one) and
+    an `Age` header, and requests whose `If-None-Match` matches get a `304 Not Modified`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: CacheBackend,
+        ttl: float = 60,
+        vary_headers: Sequence[str] = (),
+        paths: Optional[Sequence[str]] = None,
+        max_body_size: int = 1024 * 1024,
+    ):
+        self.app = app
+        self.backend = backend
+        self.ttl = ttl
+        self.vary_headers = [name.lower() for name in vary_headers]
+        self.paths = tuple(paths) if paths is not None else None
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or (self.paths is not None and not scope["path"].startswith(self.paths))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        request_cache_control = _parse_cache_control(request_headers.get("cache-control", ""))
+        if "no-store" in request_cache_control:
+            await self.app(scope, receive, send)
+            return
+
+        key = self._key(scope, request_headers)
+        credentialed = any(
+            name in request_headers and name not in self.vary_headers
+            for name in _CREDENTIAL_HEADERS
+        )
+        if "no-cache" not in request_cache_control:
+            entry = self.backend.get(key)
+            if (
+                entry is not None
+                and entry.fresh
+                and self._servable(entry, request_headers, credentialed)
+            ):
+                await self._send_cached(entry, scope, request_headers, send)
+                return
+
+        if scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        await self._call_and_store(key, scope, request_headers, credentialed, receive, send)
+
+    def _key(self, scope: Scope, request_headers: Headers) -> Hashable:
+        return (
+            scope["path"],
+            scope.get("query_string", b""),
+            tuple(request_headers.get(name, "") for name in self.vary_headers),
+        )
+
+    @staticmethod
+    def _servable(entry: CacheEntry, request_headers: Headers, credentialed: bool) -> bool:
+        """
+        Whether a cached response may be served for this request.
+        """
+        _, _, _, _, _, vary, shared = entry.value
+        if credentialed and not shared:
+            return False
+        return all(request_headers.get(name) == value for name, value in vary)
+
+    def _response_ttl(
+        self, status: int, headers: List[Tuple[bytes, bytes]], credentialed: bool
+    ) -> float:
+        """
+        Return for how many seconds a response may be cached, 0 if it may not.
+        """
+        if status != 200:
+            return 0
+        names = {name.lower() for name, _ in headers}
+        if b"set-cookie" in names:
+            return 0
+        if "*" in _vary_names(headers):
+            return 0
+        cache_control = _response_cache_control(headers)
+        if {"no-store", "private", "no-cache"} & cache_control.keys():
+            return 0
+        if credentialed and not _shared(cache_control):
+            return 0
+        for directive in ("s-maxage", "max-age"):
+            try:
+                return max(0, int(cache_control[directive]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return self.ttl
+
+    async def _send_cached(
+        self, entry: CacheEntry, scope: Scope, request_headers: Headers, send: Send
+    ) -> None:
+        status, headers, body, etag, stored_at, _, _ = entry.value
+        age = (b"age", str(int(time.time() - stored_at)).encode("latin-1"))
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            headers = [h for h in headers if h[0].lower() in _NOT_MODIFIED_HEADERS]
+            await send({"type": "http.response.start", "status": 304, "headers": headers + [age]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({"type": "http.response.start", "status": status, "headers": headers + [age]})
+        await send(
+            {"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body}
+        )
+
+    async def _call_and_store(
+        self,
+        key: Hashable,
+        scope: Scope,
+        request_headers: Headers,
+        credentialed: bool,
+        receive: Receive,
+        send: Send,
+    ):
+        """
+        Call the app, buffering a cacheable response until it is complete so that it can
+        be stored and sent with an ETag. Responses that turn out to be too large are
+        flushed and streamed through unchanged.
+        """
+        start_message: Optional[Message] = None
+        chunks: List[bytes] = []
+        body_size = 0
+        ttl = 0.0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, body_size, ttl
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                ttl = self._response_ttl(message["status"], headers, credentialed)
+                if ttl:
+                    start_message = message
+                    return
+            elif message["type"] == "http.response.body" and start_message is not None:
+                chunks.append(message.get("body", b""))
+                body_size += len(chunks[-1])
+                if body_size > self.max_body_size:
+                    await send(start_message)
+                    await send(
+                        {"type": "http.response.body", "body": b"".join(chunks), "more_body": True}
+                    )
+                    start_message = None
+                    chunks.clear()
+                    if not message.get("more_body", False):
+                        await send({"type": "http.response.body", "body": b""})
+                    return
+                if not message.get("more_body", False):
+                    await self._store_and_send(
+                        key, start_message, b"".join(chunks), ttl, request_headers, send
+                    )
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _store_and_send(
+        self,
+        key: Hashable,
+        start_message: Message,
+        body: bytes,
+        ttl: float,
+        request_headers: Headers,
+        send: Send,
+    ) -> None:
+        headers = list(start_message.get("headers", []))
+        etag = next((v.decode("latin-1") for n, v in headers if n.lower() == b"etag"), None)
+        if etag is None:
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            headers.append((b"etag", etag.encode("latin-1")))
+
+        vary = tuple((name, request_headers.get(name)) for name in _vary_names(headers))
+        shared = _shared(_response_cache_control(headers))
+        now = time.time()
+        value = (start_message["status"], headers, body, etag, now, vary, shared)
+        self.backend.set(key, value, now + ttl)
+
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def add_cache_middleware(
+    app: FastAPI,
+    ttl: float = 60,
+    max_size: Optional[int] = 1024,
+    max_bytes: Optional[int] = None,
+    vary_headers: Sequence[str] = (),
+    paths: Optional[Sequence[str]] = None,
+    max_body_size: int = 1024 * 1024,
+    backend: Optional[CacheBackend] = None,
+) -> CacheBackend:
+    """
+    Add a middleware to the FastAPI app that caches full responses to GET requests, so
+    that cache hits skip the endpoint, its database work and JSON serialization.
+    Returns the cache backend, whose `info()` and `clear()` can be used to inspect and
+    invalidate the cached responses.
+
+    ::Params::
+    ----------
+    app: FastAPI
+        The FastAPI app to add the middleware to.
+    ttl: float (default 60)
+        The number of seconds a response is cached, unless it sets `Cache-Control: max-age`.
+    max_size: int (default 1024)
+        The maximum number of cached responses (ignored if `backend` is given).
+    max_bytes: int (default None)
+        The maximum estimated size of the cached responses (ignored if `backend` is given).
+    vary_headers: Sequence[str] (default ())
+        Request headers whose values are part of the cache key, e.g. ["Authorization"] to
+        cache responses per user. Otherwise, responses to requests with credentials are
+        only cached if they set `Cache-Control: public` or `s-maxage`.
+    paths: Sequence[str] (default None)
+        Only cache requests whose path starts with one of these prefixes. If None, all
+        GET requests are cached.
+    max_body_size: int (default 1 MiB)
+        Responses with larger bodies are streamed through without being cached.
+    backend: CacheBackend (default None)
+        Where to store the responses, e.g. a `SharedMemoryBackend` to share them between
+        workers. Defaults to an in-process `TTLCache`.
+    """
+    if backend is None:
+        backend = TTLCache(max_size=max_size, max_bytes=max_bytes)
+    app.add_middleware(
+        CacheMiddleware,
+        backend=backend,
+        ttl=ttl,
+        vary_headers=vary_headers,
+        paths=paths,
+        max_body_size=max_body_size,
+    )
+    return backend
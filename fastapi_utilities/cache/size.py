@@ -0,0 +1,55 @@
+import sys
+from itertools import islice
+from typing import Any, List, Set, Tuple
+
+_ATOMIC_TYPES = (type(None), bool, int, float, complex, str, bytes, bytearray, range)
+
+
+def estimate_size(obj: Any, max_depth: int = 64, max_objects: int = 10000) -> int:
+    """
+    Return a cheap estimate of the memory used by `obj`, in bytes.
+
+    Builtin containers (dict, list, tuple, set, frozenset) and the `__dict__` / `__slots__`
+    of objects are followed, and objects referenced more than once are only counted once.
+    Anything else is measured with `sys.getsizeof`.
+
+    The walk is iterative and bounded: objects nested deeper than `max_depth` are not
+    followed, and it stops after `max_objects` objects, so very deep or very large values
+    are underestimated rather than slow to size. If it fails, the result is
+    `sys.getsizeof(obj)`.
+    """
+    try:
+        return _walk(obj, max_depth, max_objects)
+    except Exception:
+        return sys.getsizeof(obj, 0)
+
+
+def _walk(obj: Any, max_depth: int, max_objects: int) -> int:
+    seen: Set[int] = set()
+    stack: List[Tuple[Any, int]] = [(obj, 0)]
+    size = 0
+    while stack and len(seen) < max_objects:
+        obj, depth = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        size += sys.getsizeof(obj, 0)
+        if isinstance(obj, _ATOMIC_TYPES) or depth >= max_depth:
+            continue
+
+        depth += 1
+        if isinstance(obj, dict):
+            for key, value in islice(obj.items(), max_objects):
+                stack.append((key, depth))
+                stack.append((value, depth))
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend((item, depth) for item in islice(obj, max_objects))
+        else:
+            attributes = getattr(obj, "__dict__", None)
+            if attributes is not None:
+                stack.append((attributes, depth))
+            for slot in getattr(type(obj), "__slots__", ()):
+                if isinstance(slot, str) and hasattr(obj, slot):
+                    stack.append((getattr(obj, slot), depth))
+    return size
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from .base import CacheBackend, CacheEntry, StatsHook
+from .size import estimate_size
+
+
+class TTLCache(CacheBackend):
+    """
+    A thread-safe, in-process LRU mapping whose entries expire individually.
+
+    Every entry carries its own expiry time. Expired entries are dropped lazily when they
+    are looked up, and the least recently used entry is evicted in O(1) once `max_size`
+    is reached, or once the estimated size of the cached values exceeds `max_bytes`.
+    Values are only sized when `max_bytes` is set, otherwise `memory_usage` is 0. An
+    entry can be kept past its expiry (`stale_until`) so that it can be served while a
+    fresh value is being computed.
+
+    This is the default backend of `ttl_lru_cache`.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = 128,
+        stats_hook: Optional[StatsHook] = None,
+        max_bytes: Optional[int] = None,
+        size_of: Callable[[Any], int] = estimate_size,
+    ):
+        """
+        `max_size` is the maximum number of entries to keep, and `max_bytes` the maximum
+        total size of the cached values as measured by `size_of`. None means unbounded.
+        """
+        super().__init__(stats_hook=stats_hook)
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        expired = False
+        # Counted under the lock of the entries, rather than taking the stats lock as well.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.stale_until <= time.time():
+                    del self._entries[key]
+                    self._memory -= entry.size
+                    self._counts["expiration"] += 1
+                    expired = True
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+            self._counts["miss" if entry is None else "hit"] += 1
+        if self.stats_hook is not None:
+            if expired:
+                self.stats_hook("expiration", 1)
+            self.stats_hook("miss" if entry is None else "hit", 1)
+        return entry
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        expires_at: float,
+        stale_until: Optional[float] = None,
+    ) -> None:
+        """
+        Store `value` under `key` until the epoch time `expires_at`, and keep it around as
+        a stale entry until `stale_until` (defaults to `expires_at`). Values larger than
+        `max_bytes` on their own are not stored.
+        """
+        if stale_until is None or stale_until < expires_at:
+            stale_until = expires_at
+        size = self.size_of(value) if self.max_bytes is not None else 0
+        entry = CacheEntry(value, expires_at, stale_until, size)
+        evictions = 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._memory -= old.size
+            if self.max_bytes is not None and entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._memory += entry.size
+            while self._entries and self._over_budget():
+                _, evicted = self._entries.popitem(last=False)
+                self._memory -= evicted.size
+                evictions += 1
+        for _ in range(evictions):
+            self._count("eviction")
+
+    def _over_budget(self) -> bool:
+        if self.max_size is not None and len(self._entries) > self.max_size:
+            return True
+        return self.max_bytes is not None and self._memory > self.max_bytes
+
+    def pop(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._memory -= entry.size
+            return entry
+
+    def expire(self) -> int:
+        """
+        Drop every entry past `stale_until` and return how many were dropped.
+        """
+        now = time.time()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if e.stale_until <= now]
+            for key in expired:
+                self._memory -= self._entries.pop(key).size
+        for _ in expired:
+            self._count("expiration")
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._memory = 0
+            self._reset_stats()
+
+    def memory_usage(self) -> int:
+        return self._memory
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.stale_until > time.time()
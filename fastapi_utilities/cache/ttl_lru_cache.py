@@ -1,25 +1,249 @@
-from functools import lru_cache, wraps
-from typing import Callable
+import asyncio
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
 import time
 
+from .base import CacheBackend, StatsHook
+from .size import estimate_size
+from .ttl_cache import TTLCache
 
-def ttl_lru_cache(ttl: int, max_size: int = 128) -> Callable:
+
+class _KwargsMark:
+    """
+    Separates positional from keyword arguments in cache keys. Unlike a bare `object()`,
+    it pickles to the same bytes in every process, as needed by shared backends.
+    """
+
+    def __reduce__(self):
+        return "_KWARGS_MARK"
+
+
+_KWARGS_MARK = _KwargsMark()
+
+logger = logging.getLogger(__name__)
+
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+_refresh_executor_lock = threading.Lock()
+
+
+def _make_key(args: tuple, kwargs: dict) -> Hashable:
+    """
+    Build a hashable cache key from the call arguments, the same way `lru_cache` does.
+    """
+    key = args
+    if kwargs:
+        key += (_KWARGS_MARK,)
+        for item in kwargs.items():
+            key += item
+    return key
+
+
+def _refresh_failed(cache: CacheBackend, func: Callable, error: BaseException) -> None:
+    """
+    Report a background refresh that failed, which no caller is waiting for.
+    """
+    cache.record_refresh_error()
+    logger.error("Refreshing a stale entry of %s failed", func.__qualname__, exc_info=error)
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool used to refresh stale entries of regular functions.
+    """
+    global _refresh_executor
+    if _refresh_executor is None:
+        with _refresh_executor_lock:
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(
+                    thread_name_prefix="fastapi-utilities-cache"
+                )
+    return _refresh_executor
+
+
+def ttl_lru_cache(
+    ttl: int,
+    max_size: int = 128,
+    ttl_jitter: float = 0.0,
+    stale_ttl: float = 0,
+    stats_hook: Optional[StatsHook] = None,
+    max_bytes: Optional[int] = None,
+    size_of: Callable[[Any], int] = estimate_size,
+    backend: Optional[CacheBackend] = None,
+) -> Callable:
     """
-    This function is a decorator that wraps the lru_cache decorator.
+    This function is a decorator that caches the results of a function in an LRU cache
+    whose entries expire `ttl` seconds after they were stored.
+
+    Coroutine functions are supported as well: the awaited result is cached (not the
+    coroutine object), and concurrent calls that miss on the same key share a single
+    in-flight call to the wrapped function.
+
+    The decorated function exposes `cache_info()`, which returns a `CacheInfo` with the
+    hits, misses, expirations, evictions, size, estimated memory (with `max_bytes`), load
+    time and failed background refreshes of its cache, and `cache_clear()`, which empties the cache and resets these statistics.
+
+    ::Params::
+    ----------
+    ttl: int
+        The number of seconds an entry stays valid. If 0, results are not cached.
+    max_size: int (default 128)
+        The maximum number of entries to keep. If None, the cache is unbounded.
+    ttl_jitter: float (default 0.0)
+        Fraction of `ttl` by which each entry's lifetime is randomly shortened, e.g. 0.1
+        makes entries expire between 0.9 * ttl and ttl seconds after they were stored.
+        This spreads out expirations of keys that were cached at the same time.
+    stale_ttl: float (default 0)
+        The number of seconds an expired entry may still be returned (stale-while-revalidate).
+        Calls hitting a stale entry get the stale value immediately while a single
+        background refresh runs: in a thread pool for regular functions, in a task for
+        coroutine functions. A failed refresh is logged and counted as a "refresh_error",
+        and the stale value is served until the next call after it.
+    stats_hook: Callable[[str, float], None] (default None)
+        Called as `stats_hook(event, value)` on every "hit", "miss", "expiration",
+        "eviction", "load" (with the load time in seconds as value) and "refresh_error",
+        e.g. to export the cache statistics to a metrics pipeline.
+    max_bytes: int (default None)
+        The maximum estimated size of the cached values in bytes. Least recently used
+        entries are evicted to stay within it, and single values larger than it are not
+        cached. If None, only `max_size` bounds the cache.
+    size_of: Callable[[Any], int] (default estimate_size)
+        The function used to estimate the size of a cached value in bytes, only called
+        when `max_bytes` is set. The default walks builtin containers and object
+        attributes, up to a bounded depth and number of objects.
+    backend: CacheBackend (default None)
+        Where to store the entries. By default every decorated function gets its own
+        in-process `TTLCache` built from `max_size`, `max_bytes`, `size_of` and
+        `stats_hook`. Pass a shared backend, e.g. `SharedMemoryBackend()` or
+        `SQLiteBackend(path)`, to reuse values across worker processes; the cache keys
+        (and values) must then be picklable, and `cache_clear()` clears the whole backend.
+        The size of a backend is bounded by its own `max_size`: passing `max_size` or
+        `max_bytes` along with it raises a ValueError.
     """
+    if not 0.0 <= ttl_jitter < 1.0:
+        raise ValueError("ttl_jitter must be in the range [0, 1)")
+    if backend is not None and (max_size != 128 or max_bytes is not None):
+        raise ValueError(
+            "max_size and max_bytes only bound the default backend, "
+            "set the max_size of the backend instead"
+        )
+
+    def store(cache: CacheBackend, key: Hashable, value, load_start: float) -> None:
+        cache.record_load(time.perf_counter() - load_start)
+        lifetime = ttl
+        if ttl_jitter:
+            lifetime -= ttl * ttl_jitter * random.random()
+        expires_at = time.time() + lifetime
+        cache.set(key, value, expires_at, expires_at + stale_ttl)
 
     def decorator(func) -> Callable:
-        @lru_cache(maxsize=max_size)
-        def _new(*args, __time_salt, **kwargs):
-            return func(*args, **kwargs)
+        if backend is None:
+            cache = TTLCache(
+                max_size=max_size,
+                stats_hook=stats_hook,
+                max_bytes=max_bytes,
+                size_of=size_of,
+            )
+            namespace = ()
+        else:
+            cache = backend
+            namespace = (func.__module__, func.__qualname__)
+
+        if asyncio.iscoroutinefunction(func):
+            wrapper = _async_wrapper(func, ttl, stale_ttl, cache, store, namespace)
+        else:
+            refreshing = set()
+            refreshing_lock = threading.Lock()
+
+            def refresh(key: Hashable, args: tuple, kwargs: dict) -> None:
+                try:
+                    load_start = time.perf_counter()
+                    store(cache, key, func(*args, **kwargs), load_start)
+                except Exception as e:
+                    _refresh_failed(cache, func, e)
+                finally:
+                    with refreshing_lock:
+                        refreshing.discard(key)
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            if ttl:
-                return _new(*args, __time_salt=int(time.time() / ttl), **kwargs)
-            return func(*args, **kwargs)
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not ttl:
+                    return func(*args, **kwargs)
 
-        wrapper.cache_clear = _new.cache_clear
+                key = namespace + _make_key(args, kwargs)
+                entry = cache.get(key)
+                if entry is not None:
+                    # Without stale_ttl, the backend only returns fresh entries.
+                    if stale_ttl and not entry.fresh:
+                        with refreshing_lock:
+                            start_refresh = key not in refreshing
+                            refreshing.add(key)
+                        if start_refresh:
+                            _get_refresh_executor().submit(refresh, key, args, kwargs)
+                    return entry.value
+                load_start = time.perf_counter()
+                result = func(*args, **kwargs)
+                store(cache, key, result, load_start)
+                return result
+
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
         return wrapper
 
     return decorator
+
+
+def _async_wrapper(
+    func: Callable,
+    ttl: int,
+    stale_ttl: float,
+    cache: CacheBackend,
+    store: Callable,
+    namespace: tuple,
+) -> Callable:
+    """
+    Async counterpart of the wrapper used for regular functions.
+    """
+    in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def load(key: Hashable, args: tuple, kwargs: dict):
+        load_start = time.perf_counter()
+        result = await func(*args, **kwargs)
+        store(cache, key, result, load_start)
+        return result
+
+    def start_load(
+        key: Hashable, args: tuple, kwargs: dict, refresh: bool = False
+    ) -> asyncio.Future:
+        task = in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load(key, args, kwargs))
+            in_flight[key] = task
+            task.add_done_callback(lambda t: loaded(key, t, refresh))
+        return task
+
+    def loaded(key: Hashable, task: asyncio.Future, refresh: bool) -> None:
+        in_flight.pop(key, None)
+        # Callers awaiting a load get its exception, background refreshes report it.
+        if not task.cancelled() and task.exception() is not None and refresh:
+            _refresh_failed(cache, func, task.exception())
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not ttl:
+            return await func(*args, **kwargs)
+
+        key = namespace + _make_key(args, kwargs)
+        entry = cache.get(key)
+        if entry is not None:
+            if stale_ttl and not entry.fresh:
+                start_load(key, args, kwargs, refresh=True)
+            return entry.value
+
+        # Shield the shared task so that one cancelled caller does not cancel the others.
+        return await asyncio.shield(start_load(key, args, kwargs))
+
+    return wrapper
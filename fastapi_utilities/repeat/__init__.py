@@ -1,2 +1,8 @@
 from .repeat_at import repeat_at
-from .repeat_every import repeat_every
\ No newline at end of file
+from .repeat_every import repeat_every
+from .batch import Batcher, batch_every
+from .cron import CronSchedule
+from .locks import DatabaseLock, FileLock, JobLock
+from .runner import set_max_concurrent_jobs
+from .scheduler import Job, Scheduler
+from .store import JobState, JobStore
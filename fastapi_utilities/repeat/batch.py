@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import typing
+
+from functools import update_wrapper
+from anyio import to_thread
+
+from .runner import _job_limiter, keep_running
+
+
+class Batcher:
+    """
+    Gathers the items added to it into batches, and passes every batch to `handler`, a
+    sync (run in a thread) or async function that takes a list of items and returns a
+    list with the result of each of them, or None.
+
+    A batch is handled once it holds `max_size` items, or `seconds` seconds after its first
+    item was added, one batch at a time. At most `max_queue` items wait to be handled:
+    adding more waits for room, which slows down producers when the handler cannot keep up.
+
+    Each item gets a future with its result, or with the exception raised by the handler
+    for its batch.
+    """
+
+    def __init__(
+        self,
+        handler: typing.Callable,
+        seconds: float,
+        max_size: int = 100,
+        max_queue: int = 10000,
+        logger: typing.Optional[logging.Logger] = None,
+    ):
+        if max_size < 1 or max_queue < max_size:
+            raise ValueError("max_size must be at least 1 and max_queue at least max_size")
+        update_wrapper(self, handler)
+        self.handler = handler
+        self.is_coroutine = asyncio.iscoroutinefunction(handler)
+        self.seconds = seconds
+        self.max_size = max_size
+        self.max_queue = max_queue
+        self.logger = logger
+        self.batches = 0
+        self._pending: typing.List[typing.Tuple[typing.Any, asyncio.Future]] = []
+        self._handling: typing.List[typing.Tuple[typing.Any, asyncio.Future]] = []
+        # Items pending or being handled.
+        self._queued = 0
+        # Created in the event loop on first use.
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._room: typing.Optional[asyncio.Event] = None
+        self._ready: typing.Optional[asyncio.Event] = None
+        self._timer: typing.Optional[asyncio.TimerHandle] = None
+        self._worker: typing.Optional[asyncio.Future] = None
+
+    def __len__(self) -> int:
+        """
+        The number of items waiting to be handled.
+        """
+        return len(self._pending)
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._handling = []
+            self._queued = 0
+            self._room = asyncio.Event()
+            self._ready = asyncio.Event()
+            self._timer = None
+            self._worker = keep_running(self._run())
+
+    async def __call__(self, item: typing.Any) -> typing.Any:
+        """
+        Add an item and wait for its result.
+        """
+        return await (await self.add(item))
+
+    async def add(self, item: typing.Any) -> asyncio.Future:
+        """
+        Add an item, waiting for room if `max_queue` items are waiting, and return the
+        future of its result.
+        """
+        self._start()
+        while self._queued >= self.max_queue:
+            self._room.clear()
+            await self._room.wait()
+        return self._append(item)
+
+    def add_nowait(self, item: typing.Any) -> asyncio.Future:
+        """
+        Add an item and return the future of its result. Raises `asyncio.QueueFull` if
+        `max_queue` items are waiting.
+        """
+        self._start()
+        if self._queued >= self.max_queue:
+            raise asyncio.QueueFull
+        return self._append(item)
+
+    def _append(self, item: typing.Any) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._queued += 1
+        if len(self._pending) >= self.max_size:
+            self._ready.set()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.seconds, self._ready.set)
+        return future
+
+    async def flush(self) -> None:
+        """
+        Handle the waiting items now, and wait until they and the batch being handled are.
+        """
+        futures = [future for _, future in self._handling + self._pending]
+        if not futures:
+            return
+        if self._pending:
+            self._ready.set()
+        await asyncio.gather(*futures, return_exceptions=True)
+
+    async def close(self) -> None:
+        """
+        Handle the waiting items, wait for the batch being handled, and stop.
+        """
+        await self.flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch = self._pending[: self.max_size]
+            del self._pending[: self.max_size]
+            if self._pending:
+                # Items added while the previous batch was handled.
+                if len(self._pending) >= self.max_size:
+                    self._ready.set()
+                else:
+                    self._timer = loop.call_later(self.seconds, self._ready.set)
+            if batch:
+                self._handling = batch
+                try:
+                    await self._handle(batch)
+                finally:
+                    self._handling = []
+                self._queued -= len(batch)
+                self._room.set()
+
+    async def _handle(self, batch: typing.List[typing.Tuple[typing.Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            if self.is_coroutine:
+                results = await self.handler(items)
+            else:
+                results = await to_thread.run_sync(self.handler, items, limiter=_job_limiter())
+            if results is None:
+                results = [None] * len(items)
+            elif len(results) != len(items):
+                raise ValueError(
+                    f"The handler returned {len(results)} results for {len(items)} items"
+                )
+        except asyncio.CancelledError:
+            # Left pending, the futures would never resolve.
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.exception(e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.batches += 1
+
+
+def batch_every(
+    *,
+    seconds: float,
+    max_size: int = 100,
+    max_queue: int = 10000,
+    logger: logging.Logger = None,
+) -> typing.Callable[[typing.Callable], Batcher]:
+    """
+    This function returns a decorator that turns a function handling a list of items into
+    a `Batcher`, which can be called with a single item and gathers the items into batches.
+
+    :: Params ::
+    ------------
+    seconds: float
+        The maximum number of seconds an item waits for its batch to fill up.
+    max_size: int (default 100)
+        The maximum number of items in a batch. A full batch is handled right away.
+    max_queue: int (default 10000)
+        The maximum number of items waiting to be handled. Adding more waits for room.
+    logger: logging.Logger (default None)
+        The logger to use for logging exceptions raised by the handler.
+    """
+
+    def decorator(func: typing.Callable) -> Batcher:
+        return Batcher(func, seconds, max_size=max_size, max_queue=max_queue, logger=logger)
+
+    return decorator
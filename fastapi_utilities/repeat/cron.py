@@ -0,0 +1,112 @@
+import typing
+
+from datetime import datetime, tzinfo
+from dateutil import tz as dateutil_tz
+
+
+def _timezone(tz: typing.Union[str, tzinfo, None]) -> tzinfo:
+    if tz is None:
+        return dateutil_tz.tzlocal()
+    if isinstance(tz, str):
+        zone = dateutil_tz.gettz(tz)
+        if zone is None:
+            raise ValueError(f"Unknown time zone: '{tz}'")
+        return zone
+    return tz
+
+
+class CronSchedule:
+    """
+    A cron expression parsed once, that yields its fire times in the time zone `tz` (a
+    name like "Europe/Paris" or a tzinfo, the local time zone by default).
+
+    Fire times are timezone-aware, so daylight saving time changes neither skip nor repeat
+    runs: a time skipped when clocks go forward is shifted forward by the gap (02:30 fires
+    at 03:30 when clocks jump from 02:00 to 03:00), and a time repeated when they go back
+    fires once, at its first occurrence. Each fire time is computed from the previous one rather
+    than from the clock, so a run that ends within the minute it was scheduled for is not
+    scheduled again for the same minute.
+
+    Usage:
+        schedule = CronSchedule("0 9 * * 1-5", tz="Europe/Paris")
+        await asyncio.sleep(schedule.delay())
+    """
+
+    def __init__(self, cron: str, tz: typing.Union[str, tzinfo, None] = None):
+        # Imported here, so that importing the package does not import croniter.
+        from croniter import croniter
+
+        if not croniter.is_valid(cron):
+            raise ValueError(f"Invalid cron expression: '{cron}'")
+        self.cron = cron
+        self.tz = _timezone(tz)
+        self.last_fire: typing.Optional[datetime] = None
+        # Fire times are computed in naive wall-clock time, which is cheaper than croniter's
+        # timezone-aware arithmetic and never yields a wall-clock time twice.
+        self._last_wall: typing.Optional[datetime] = None
+        self._iter = croniter(cron, self._wall(self.now()), ret_type=datetime)
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    def _wall(self, moment: datetime) -> datetime:
+        if moment.tzinfo is None:
+            return moment
+        return moment.astimezone(self.tz).replace(tzinfo=None)
+
+    def _localize(self, wall: datetime) -> datetime:
+        moment = wall.replace(tzinfo=self.tz)
+        if not dateutil_tz.datetime_exists(moment):
+            moment = dateutil_tz.resolve_imaginary(moment)
+        return moment
+
+    def next_fire(self, after: typing.Optional[datetime] = None) -> datetime:
+        """
+        Return the first fire time after `after`, or after the last fire time (and now) by
+        default. It becomes the last fire time. A naive `after` is read in `tz`.
+        """
+        if after is None:
+            after_wall = self._wall(self.now())
+            if self._last_wall is not None and self._last_wall > after_wall:
+                after_wall = self._last_wall
+        else:
+            after_wall = self._wall(after)
+        self._iter.set_current(after_wall)
+        self._last_wall = self._iter.get_next(datetime)
+        self.last_fire = self._localize(self._last_wall)
+        return self.last_fire
+
+    def delay(self) -> float:
+        """
+        Return the seconds until the next fire time, see `next_fire`.
+        """
+        fire = self.next_fire()
+        return max(0.0, (fire - self.now()).total_seconds())
+
+    def next_fire_times(
+        self, n: int, after: typing.Optional[datetime] = None
+    ) -> typing.List[datetime]:
+        """
+        Return the next `n` fire times after `after` (now by default), without changing the
+        last fire time.
+        """
+        self._iter.set_current(self._wall(after or self.now()))
+        get_next, localize = self._iter.get_next, self._localize
+        return [localize(get_next(datetime)) for _ in range(n)]
+
+    def fire_times_between(
+        self, after: datetime, before: datetime, limit: int = 1000
+    ) -> typing.List[datetime]:
+        """
+        Return the fire times after `after` and up to `before`, at most `limit` of them,
+        without changing the last fire time.
+        """
+        self._iter.set_current(self._wall(after))
+        before_wall = self._wall(before)
+        fires: typing.List[datetime] = []
+        while len(fires) < limit:
+            wall = self._iter.get_next(datetime)
+            if wall > before_wall:
+                break
+            fires.append(self._localize(wall))
+        return fires
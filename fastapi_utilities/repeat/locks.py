@@ -0,0 +1,179 @@
+import json
+import os
+import socket
+import threading
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from sqlalchemy import Table
+
+    from ..session import FastAPISessionMaker
+
+
+def lock_owner() -> str:
+    """
+    Returns the identity a process holds job leases under, "<hostname>:<pid>". It is read
+    on every call, so that forked workers do not share the identity of their parent.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobLock:
+    """
+    Base class of the leases that let a single process run a job when several run the
+    same schedule, e.g. the workers of gunicorn.
+
+    A lease is held by one owner until it expires, and the owner renews it on every tick,
+    so a job keeps running in the same process as long as it is alive and moves to another
+    one `ttl` seconds after it dies. Lease times are read from the clock of each process,
+    so the clocks of different hosts must be kept in sync.
+    """
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew the lease on `key` for `ttl` seconds, if it is free, expired or
+        already held by `owner`. Returns whether `owner` holds it.
+        """
+        raise NotImplementedError
+
+    def release(self, key: str, owner: str) -> None:
+        """
+        Give up the lease on `key` if `owner` holds it.
+        """
+        raise NotImplementedError
+
+
+class FileLock(JobLock):
+    """
+    Leases kept in a JSON file, read and written under an exclusive `fcntl` lock, for the
+    processes of a single host. Not available on Windows.
+
+    `path` should be specific to the app, in a directory other users cannot write to:
+    apps sharing the file share the leases of jobs with the same name. It is created
+    readable by the current user only.
+    """
+
+    def __init__(self, path: str):
+        import fcntl
+
+        self._fcntl = fcntl
+        self.path = path
+
+    def _update(self, change: typing.Callable[[dict], bool]) -> bool:
+        with os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), "r+") as file:
+            self._fcntl.flock(file, self._fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                content = file.read()
+                leases = json.loads(content) if content else {}
+                changed = change(leases)
+                if changed:
+                    file.seek(0)
+                    file.truncate()
+                    json.dump(leases, file)
+                    file.flush()
+                return changed
+            finally:
+                self._fcntl.flock(file, self._fcntl.LOCK_UN)
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        def take(leases: dict) -> bool:
+            now = time.time()
+            holder = leases.get(key)
+            if holder is not None and holder[0] != owner and holder[1] > now:
+                return False
+            leases[key] = [owner, now + ttl]
+            return True
+
+        return self._update(take)
+
+    def release(self, key: str, owner: str) -> None:
+        def give_up(leases: dict) -> bool:
+            holder = leases.get(key)
+            if holder is None or holder[0] != owner:
+                return False
+            del leases[key]
+            return True
+
+        self._update(give_up)
+
+
+class _LazyTable:
+    """
+    A table created, if missing, the first time it is used.
+    """
+
+    def __init__(self, table: "Table"):
+        self.table = table
+        self._created = False
+        self._lock = threading.Lock()
+
+    def ensure(self, session) -> None:
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    self.table.create(bind=session.connection(), checkfirst=True)
+                    session.commit()
+                    self._created = True
+
+
+class DatabaseLock(JobLock):
+    """
+    Leases kept as rows of a table (created if missing) in the database of a
+    `FastAPISessionMaker`, for processes spread over several hosts.
+
+    A lease is taken with a single conditional `UPDATE`, or an `INSERT` if the row does not
+    exist yet, so that only one of the processes racing for it succeeds on any database.
+    """
+
+    def __init__(
+        self,
+        session_maker: "FastAPISessionMaker",
+        table_name: str = "fastapi_utilities_job_locks",
+    ):
+        # Imported here, so that importing the package does not import SQLAlchemy.
+        from sqlalchemy import Column, Float, MetaData, String, Table
+
+        self.session_maker = session_maker
+        self.table = Table(
+            table_name,
+            MetaData(),
+            Column("name", String(255), primary_key=True),
+            Column("owner", String(255), nullable=False),
+            Column("expires_at", Float, nullable=False),
+        )
+        self._lazy_table = _LazyTable(self.table)
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        from sqlalchemy import exc, insert, update
+
+        table = self.table
+        now = time.time()
+        with self.session_maker.context_session() as session:
+            self._lazy_table.ensure(session)
+            renewed = session.execute(
+                update(table)
+                .where(table.c.name == key)
+                .where((table.c.owner == owner) | (table.c.expires_at <= now))
+                .values(owner=owner, expires_at=now + ttl)
+            )
+            if renewed.rowcount == 1:
+                return True
+            try:
+                session.execute(insert(table).values(name=key, owner=owner, expires_at=now + ttl))
+            except exc.IntegrityError:
+                # Another process inserted the row first and holds the lease.
+                session.rollback()
+                return False
+            return True
+
+    def release(self, key: str, owner: str) -> None:
+        from sqlalchemy import delete
+
+        table = self.table
+        with self.session_maker.context_session() as session:
+            self._lazy_table.ensure(session)
+            session.execute(
+                delete(table).where(table.c.name == key).where(table.c.owner == owner)
+            )
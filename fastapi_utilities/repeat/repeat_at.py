@@ -1,30 +1,46 @@
 import asyncio
 import logging
+import time
 import typing
 
-from datetime import datetime
+from concurrent.futures import Executor
+from datetime import tzinfo
 from functools import wraps
-from asyncio import ensure_future
-from starlette.concurrency import run_in_threadpool
-from croniter import croniter
+
+from .cron import CronSchedule
+from .locks import JobLock
+from .runner import JobRunner, keep_running
+from .store import MISFIRE_POLICIES, JobStore, missed_runs
+
+if typing.TYPE_CHECKING:
+    from .scheduler import Scheduler
 
 _FuncType = typing.TypeVar("_FuncType", bound=typing.Callable)
 
 
-def get_delta(cron: str) -> float:
+def get_delta(cron: str, tz: typing.Union[str, tzinfo, None] = None) -> float:
     """
-    Returns the time delta between now and the next cron execution time.
+    Returns the time delta between now and the next cron execution time in the time zone
+    `tz` (the local one by default). Parses `cron` on every call, keep a `CronSchedule` to
+    compute several.
     """
-    now = datetime.now()
-    cron = croniter(cron, now)
-    return (cron.get_next(datetime) - now).total_seconds()
+    return CronSchedule(cron, tz=tz).delay()
+
 
 def repeat_at(
     *,
     cron: str,
+    tz: typing.Union[str, tzinfo, None] = None,
     logger: logging.Logger = None,
     raise_exceptions: bool = False,
     max_repetitions: int = None,
+    max_instances: int = 1,
+    executor: typing.Optional[Executor] = None,
+    scheduler: "typing.Optional[Scheduler]" = None,
+    lock: typing.Optional[JobLock] = None,
+    lock_ttl: float = 60,
+    store: typing.Optional[JobStore] = None,
+    misfire: str = "run_once",
 ) -> typing.Callable[[_FuncType], _FuncType]:
     """
     Decorator to schedule a function's execution based on a cron expression.
@@ -33,56 +49,96 @@ def repeat_at(
     -----------
     cron: str
         Cron-style string for periodic execution, e.g., '0 0 * * *' for every midnight.
+    tz: str | tzinfo (default None)
+        Time zone the cron expression is in, e.g. 'Europe/Paris'. Defaults to the local one.
     logger: logging.Logger (default None)
         Logger object to log exceptions.
     raise_exceptions: bool (default False)
         Whether to raise exceptions or log them.
     max_repetitions: int (default None)
         Maximum number of times to repeat the function. If None, repeats indefinitely.
+    max_instances: int (default 1)
+        Maximum number of runs of the function at the same time. Above 1, runs are started
+        in the background on schedule, and skipped while `max_instances` are going.
+    executor: concurrent.futures.Executor (default None)
+        Executor to run a sync function in, e.g. a ProcessPoolExecutor for CPU-bound work.
+        By default it runs in a thread.
+    scheduler: Scheduler (default None)
+        If given, add the function to this scheduler as a job instead of starting a loop
+        for it when it is called. The function is returned unchanged.
+    lock: JobLock (default None)
+        Lease shared by the processes running this schedule, e.g. a `FileLock` for the
+        workers of one host or a `DatabaseLock` for several hosts, so that each run happens
+        in only one of them.
+    lock_ttl: float (default 60)
+        How long the lease of the process running the job lasts without being renewed. It
+        should be longer than a run.
+    store: JobStore (default None)
+        Where to keep the time of the last run and the number of runs, so that they survive
+        restarts. With a scheduler, the scheduler's store is used instead.
+    misfire: str (default "run_once")
+        With a store, what to do at startup with the runs missed while the app was down:
+        "run_once" for all of them, "run_all" of them (up to 1000), or "skip" them.
     """
+    if misfire not in MISFIRE_POLICIES:
+        raise ValueError(f"misfire must be one of {MISFIRE_POLICIES}, not '{misfire}'")
 
     def decorator(func: _FuncType) -> _FuncType:
+        if scheduler is not None:
+            scheduler.add_job(
+                func,
+                cron=cron,
+                tz=tz,
+                logger=logger,
+                raise_exceptions=raise_exceptions,
+                max_repetitions=max_repetitions,
+                max_instances=max_instances,
+                executor=executor,
+                lock=lock,
+                lock_ttl=lock_ttl,
+                misfire=misfire,
+            )
+            return func
+
         is_coroutine = asyncio.iscoroutinefunction(func)
+        runner = JobRunner(
+            func,
+            logger=logger,
+            raise_exceptions=raise_exceptions,
+            max_instances=max_instances,
+            executor=executor,
+            lock=lock,
+            lock_ttl=lock_ttl,
+        )
 
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
+        async def run_schedule(schedule: CronSchedule, args: tuple, kwargs: dict) -> None:
             repetitions = 0
-            if not croniter.is_valid(cron):
-                raise ValueError(f"Invalid cron expression: '{cron}'")
+            catch_up = 0
+            if store is not None:
+                state = await store.get(runner.name)
+                if state is not None:
+                    repetitions = state.runs
+                    catch_up = missed_runs(schedule, state, misfire)
 
             while max_repetitions is None or repetitions < max_repetitions:
-                try:
-                    sleep_time = get_delta(cron)
+                if catch_up:
+                    catch_up -= 1
+                else:
+                    sleep_time = schedule.delay()
                     await asyncio.sleep(sleep_time)
-                    await func(*args, **kwargs)
-                except Exception as e:
-                    if logger:
-                        logger.exception(e)
-                    if raise_exceptions:
-                        raise e
+                due = time.time()
+                ran = await runner.tick(*args, **kwargs)
                 repetitions += 1
+                if store is not None and ran:
+                    store.record(runner.name, due, repetitions)
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            await run_schedule(CronSchedule(cron, tz), args, kwargs)
 
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            repetitions = 0
-            if not croniter.is_valid(cron):
-                raise ValueError(f"Invalid cron expression: '{cron}'")
-
-            async def loop():
-                nonlocal repetitions
-                while max_repetitions is None or repetitions < max_repetitions:
-                    try:
-                        sleep_time = get_delta(cron)
-                        await asyncio.sleep(sleep_time)
-                        await run_in_threadpool(func, *args, **kwargs)
-                    except Exception as e:
-                        if logger:
-                            logger.exception(e)
-                        if raise_exceptions:
-                            raise e
-                    repetitions += 1
-
-            ensure_future(loop())
+            keep_running(run_schedule(CronSchedule(cron, tz), args, kwargs))
 
         # Return the appropriate wrapper based on the function type
         return async_wrapper if is_coroutine else sync_wrapper
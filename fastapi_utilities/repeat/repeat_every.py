@@ -1,14 +1,37 @@
 import asyncio
 import logging
+import math
+import random
 import typing
 
+from concurrent.futures import Executor
 from functools import wraps
-from asyncio import ensure_future
-from starlette.concurrency import run_in_threadpool
 
+from .locks import JobLock
+from .runner import JobRunner, keep_running
+
+
+if typing.TYPE_CHECKING:
+    from .scheduler import Scheduler
 
 _FuncType = typing.TypeVar("_FuncType", bound=typing.Callable)
 
+MISSED_TICK_POLICIES = ("skip", "catch_up", "coalesce")
+
+
+def _next_run(next_run: float, now: float, seconds: float, on_missed: str) -> float:
+    """
+    Returns the time of the next run in fixed-rate mode, given that the previous one was
+    due at `next_run - seconds` and has just finished at `now`.
+    """
+    if next_run >= now or on_missed == "catch_up":
+        return next_run
+    missed = math.floor((now - next_run) / seconds)
+    if on_missed == "coalesce":
+        # Run once now for all the missed ticks, on the latest of them.
+        return next_run + missed * seconds
+    return next_run + (missed + 1) * seconds
+
 
 def repeat_every(
     *,
@@ -17,10 +40,22 @@ def repeat_every(
     logger: logging.Logger = None,
     raise_exceptions: bool = False,
     max_repetitions: int = None,
+    fixed_rate: bool = False,
+    on_missed: str = "skip",
+    jitter: float = 0,
+    max_instances: int = 1,
+    executor: typing.Optional[Executor] = None,
+    scheduler: "typing.Optional[Scheduler]" = None,
+    lock: typing.Optional[JobLock] = None,
+    lock_ttl: typing.Optional[float] = None,
 ) -> typing.Callable[[_FuncType], _FuncType]:
     """
     This function returns a decorator that schedules a function to execute periodically after every `seconds` seconds.
 
+    By default, the function waits `seconds` seconds after each run finished, so the actual
+    period is `seconds` plus the run time. With `fixed_rate`, runs are scheduled every
+    `seconds` seconds on the event loop's monotonic clock instead, so they do not drift.
+
     :: Params ::
     ------------
     seconds: float
@@ -33,10 +68,68 @@ def repeat_every(
         Whether to raise exceptions instead of logging them.
     max_repetitions: int (default None)
         The maximum number of times to repeat the function. If None, the function will repeat indefinitely.
+    fixed_rate: bool (default False)
+        Whether to run every `seconds` seconds regardless of how long each run takes.
+    on_missed: str (default "skip")
+        What to do in fixed-rate mode with the ticks missed while a run took longer than
+        `seconds`: "skip" them and wait for the next tick, "catch_up" by running once for
+        each of them right away, or "coalesce" them into a single run right away.
+    jitter: float (default 0)
+        Delay every run by a random time of up to `jitter` seconds, so that workers started
+        together do not all run at the same time. Fixed-rate ticks stay on schedule.
+    max_instances: int (default 1)
+        The maximum number of runs of the function at the same time. Above 1, runs are
+        started in the background on schedule, and skipped while `max_instances` are going.
+    executor: concurrent.futures.Executor (default None)
+        The executor to run a sync function in, e.g. a ProcessPoolExecutor for CPU-bound
+        work. By default it runs in a thread.
+    scheduler: Scheduler (default None)
+        If given, add the function to this scheduler as a job instead of starting a loop
+        for it when it is called. The function is returned unchanged.
+    lock: JobLock (default None)
+        A lease shared by the processes running this schedule, e.g. a `FileLock` for the
+        workers of one host or a `DatabaseLock` for several hosts, so that each tick runs in
+        only one of them.
+    lock_ttl: float (default 2 * seconds)
+        How long the lease of the process running the job lasts without being renewed, i.e.
+        how long another process waits to take over after it dies. It should be longer than
+        `seconds` and than a run.
     """
+    if on_missed not in MISSED_TICK_POLICIES:
+        raise ValueError(f"on_missed must be one of {MISSED_TICK_POLICIES}, not '{on_missed}'")
+    if jitter < 0:
+        raise ValueError("jitter must be >= 0")
+    if fixed_rate and seconds <= 0:
+        raise ValueError("seconds must be > 0 with fixed_rate")
 
     def decorator(func: _FuncType) -> _FuncType:
-        is_coroutine = asyncio.iscoroutinefunction(func)
+        if scheduler is not None:
+            scheduler.add_job(
+                func,
+                seconds=seconds,
+                wait_first=wait_first,
+                fixed_rate=fixed_rate,
+                on_missed=on_missed,
+                jitter=jitter,
+                logger=logger,
+                raise_exceptions=raise_exceptions,
+                max_repetitions=max_repetitions,
+                max_instances=max_instances,
+                executor=executor,
+                lock=lock,
+                lock_ttl=lock_ttl,
+            )
+            return func
+
+        runner = JobRunner(
+            func,
+            logger=logger,
+            raise_exceptions=raise_exceptions,
+            max_instances=max_instances,
+            executor=executor,
+            lock=lock,
+            lock_ttl=lock_ttl if lock_ttl is not None else 2 * seconds,
+        )
 
         @wraps(func)
         async def wrapper(*args, **kwargs):
@@ -44,23 +137,24 @@ def repeat_every(
 
             async def loop(*args, **kwargs):
                 nonlocal repetitions
-                if wait_first:
-                    await asyncio.sleep(seconds)
+                event_loop = asyncio.get_running_loop()
+                next_run = event_loop.time() + (seconds if wait_first else 0)
                 while max_repetitions is None or repetitions < max_repetitions:
-                    try:
-                        if is_coroutine:
-                            await func(*args, **kwargs)
-                        else:
-                            await run_in_threadpool(func, *args, **kwargs)
-                    except Exception as e:
-                        if logger is not None:
-                            logger.exception(e)
-                        if raise_exceptions:
-                            raise e
+                    delay = next_run - event_loop.time()
+                    if jitter:
+                        delay += random.uniform(0, jitter)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    await runner.tick(*args, **kwargs)
                     repetitions += 1
-                    await asyncio.sleep(seconds)
+                    if fixed_rate:
+                        next_run = _next_run(
+                            next_run + seconds, event_loop.time(), seconds, on_missed
+                        )
+                    else:
+                        next_run = event_loop.time() + seconds
 
-            ensure_future(loop(*args, **kwargs))
+            keep_running(loop(*args, **kwargs))
 
         return wrapper
 
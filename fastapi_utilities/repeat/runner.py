@@ -0,0 +1,219 @@
+import asyncio
+import functools
+import importlib
+import logging
+import time
+import typing
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from anyio import CapacityLimiter, to_thread
+
+from .locks import JobLock, lock_owner
+
+# The same default as anyio's thread limiter, so that sync jobs get a bounded pool.
+DEFAULT_MAX_CONCURRENT_JOBS = 40
+
+_max_concurrent_jobs: int = DEFAULT_MAX_CONCURRENT_JOBS
+_limiters: "typing.Dict[asyncio.AbstractEventLoop, CapacityLimiter]" = {}
+_background_tasks: "typing.Set[asyncio.Future]" = set()
+
+
+def keep_running(coroutine: typing.Awaitable) -> "asyncio.Future":
+    """
+    Schedule `coroutine` as a task and keep a reference to it until it is done, so that it
+    cannot be garbage-collected while it runs.
+    """
+    task = asyncio.ensure_future(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def set_max_concurrent_jobs(limit: typing.Optional[int]) -> None:
+    """
+    Cap the number of runs of `repeat_every` and `repeat_at` jobs that execute at the same
+    time, across all jobs, so that background work cannot starve request handling. The cap
+    is `DEFAULT_MAX_CONCURRENT_JOBS` (40) until set, and None restores it.
+
+    Sync jobs run in threads under this limiter instead of Starlette's default thread
+    limiter, so they never take a thread slot from a sync endpoint.
+    """
+    global _max_concurrent_jobs
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    _max_concurrent_jobs = DEFAULT_MAX_CONCURRENT_JOBS if limit is None else limit
+    for limiter in _limiters.values():
+        limiter.total_tokens = _max_concurrent_jobs
+
+
+def _job_limiter() -> CapacityLimiter:
+    """
+    Return the job limiter of the running event loop, creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        for closed in [other for other in _limiters if other.is_closed()]:
+            del _limiters[closed]
+        limiter = _limiters[loop] = CapacityLimiter(_max_concurrent_jobs)
+    return limiter
+
+
+def _call_by_name(module: str, qualname: str, args: tuple, kwargs: dict) -> typing.Any:
+    """
+    Call the function wrapped by the scheduling decorator at `module.qualname`. Used to
+    send jobs to a process pool, where the decorated function itself cannot be pickled.
+    """
+    target: typing.Any = importlib.import_module(module)
+    for name in qualname.split("."):
+        target = getattr(target, name)
+    return getattr(target, "__wrapped__", target)(*args, **kwargs)
+
+
+class JobRunner:
+    """
+    Runs one scheduled job: at most `max_instances` runs at a time, sync functions in
+    `executor` (or in a thread), and every run under the global job limiter.
+
+    With `max_instances` 1, each run is awaited before the schedule moves on. Above that,
+    runs are started in the background and a tick is skipped, with a warning, when
+    `max_instances` runs are still going.
+
+    With a `lock`, a tick only runs if this process holds, or can take, the lease on the
+    job `name`, which it renews for `lock_ttl` seconds on every tick.
+
+    It counts the runs, failed runs, skipped ticks and ticks left to another process,
+    and keeps the duration of the last run and the last exception raised.
+    """
+
+    def __init__(
+        self,
+        func: typing.Callable,
+        logger: typing.Optional[logging.Logger] = None,
+        raise_exceptions: bool = False,
+        max_instances: int = 1,
+        executor: typing.Optional[Executor] = None,
+        lock: typing.Optional[JobLock] = None,
+        lock_ttl: float = 60,
+        name: typing.Optional[str] = None,
+    ):
+        if max_instances < 1:
+            raise ValueError("max_instances must be at least 1")
+        if lock is not None and lock_ttl <= 0:
+            raise ValueError("lock_ttl must be > 0")
+        self.func = func
+        self.is_coroutine = asyncio.iscoroutinefunction(func)
+        self.logger = logger
+        self.raise_exceptions = raise_exceptions
+        self.max_instances = max_instances
+        self.executor = executor
+        self.lock = lock
+        self.name = name or f"{func.__module__}.{func.__qualname__}"
+        self.lock_ttl = lock_ttl
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.not_leader = 0
+        self.last_duration: typing.Optional[float] = None
+        self.last_error: typing.Optional[BaseException] = None
+        self._running: "typing.Set[asyncio.Task]" = set()
+        self._failure: typing.Optional[BaseException] = None
+
+    async def tick(self, *args, **kwargs) -> bool:
+        """
+        Start a run of the job, waiting for it if `max_instances` is 1. Returns False if the
+        tick was skipped, because of `max_instances` or because another process holds the
+        lease.
+        """
+        if self._failure is not None:
+            failure, self._failure = self._failure, None
+            raise failure
+        if self.lock is not None and not await self._acquire_lease():
+            self.not_leader += 1
+            return False
+        if self.max_instances == 1:
+            await self._run(*args, **kwargs)
+            return True
+        if len(self._running) >= self.max_instances:
+            self.skipped += 1
+            if self.logger is not None:
+                self.logger.warning(
+                    "Skipping a run of %s: %d runs still going",
+                    self.func.__qualname__,
+                    len(self._running),
+                )
+            return False
+        task = asyncio.ensure_future(self._run(*args, **kwargs))
+        self._running.add(task)
+        task.add_done_callback(self._done)
+        return True
+
+    async def _acquire_lease(self) -> bool:
+        try:
+            return await to_thread.run_sync(
+                self.lock.acquire,
+                self.name,
+                lock_owner(),
+                self.lock_ttl,
+                limiter=_job_limiter(),
+            )
+        except Exception as e:
+            # Without knowing who holds the lease, leave the tick to whoever does.
+            if self.logger is not None:
+                self.logger.exception(e)
+            return False
+
+    async def release_lease(self) -> None:
+        """
+        Give up the lease of this process, if any, so that another one can take over the job
+        without waiting for it to expire.
+        """
+        if self.lock is not None:
+            await to_thread.run_sync(self.lock.release, self.name, lock_owner())
+
+    def _done(self, task: "asyncio.Task") -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None and self._failure is None:
+            self._failure = task.exception()
+
+    @property
+    def running(self) -> int:
+        """
+        The number of runs going on in the background.
+        """
+        return len(self._running)
+
+    async def _run(self, *args, **kwargs) -> None:
+        start = time.perf_counter()
+        try:
+            await self._call(*args, **kwargs)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = e
+            if self.logger is not None:
+                self.logger.exception(e)
+            if self.raise_exceptions:
+                raise e
+        finally:
+            self.runs += 1
+            self.last_duration = time.perf_counter() - start
+
+    async def _call(self, *args, **kwargs) -> None:
+        limiter = _job_limiter()
+        if self.is_coroutine:
+            async with limiter:
+                await self.func(*args, **kwargs)
+        elif self.executor is None:
+            await to_thread.run_sync(
+                functools.partial(self.func, *args, **kwargs), limiter=limiter
+            )
+        else:
+            if isinstance(self.executor, ProcessPoolExecutor):
+                call = functools.partial(
+                    _call_by_name, self.func.__module__, self.func.__qualname__, args, kwargs
+                )
+            else:
+                call = functools.partial(self.func, *args, **kwargs)
+            async with limiter:
+                await asyncio.get_running_loop().run_in_executor(self.executor, call)
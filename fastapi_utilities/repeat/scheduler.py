@@ -0,0 +1,410 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+import typing
+
+from concurrent.futures import Executor
+from datetime import datetime, timedelta, timezone, tzinfo
+
+from .cron import CronSchedule
+from .repeat_every import MISSED_TICK_POLICIES, _next_run
+from .locks import JobLock
+from .runner import JobRunner
+from .store import MISFIRE_POLICIES, JobStore, missed_runs
+
+
+class Job:
+    """
+    A job owned by a `Scheduler`: a function run every `seconds` seconds or on a `cron`
+    expression, with its run statistics.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: typing.Callable,
+        runner: JobRunner,
+        seconds: typing.Optional[float] = None,
+        cron: typing.Optional[str] = None,
+        tz: typing.Union[str, tzinfo, None] = None,
+        args: tuple = (),
+        kwargs: typing.Optional[dict] = None,
+        wait_first: bool = False,
+        fixed_rate: bool = False,
+        on_missed: str = "skip",
+        jitter: float = 0,
+        max_repetitions: typing.Optional[int] = None,
+        misfire: str = "run_once",
+    ):
+        self.name = name
+        self.func = func
+        self.runner = runner
+        self.seconds = seconds
+        self.cron = cron
+        self.schedule = CronSchedule(cron, tz) if cron is not None else None
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.wait_first = wait_first
+        self.fixed_rate = fixed_rate
+        self.on_missed = on_missed
+        self.jitter = jitter
+        self.max_repetitions = max_repetitions
+        self.misfire = misfire
+        self.ticks = 0
+        # Runs missed while the app was down, to make right away.
+        self._catch_up = 0
+        # Loop time of the next tick, and the heap entry scheduling it.
+        self.next_run: typing.Optional[float] = None
+        self.next_run_at: typing.Optional[datetime] = None
+        self._entry: typing.Optional[list] = None
+
+    def _first_run(self, now: float) -> float:
+        if self._catch_up:
+            self._catch_up -= 1
+            return now
+        if self.schedule is not None:
+            return now + self.schedule.delay()
+        return now + (self.seconds if self.wait_first else 0)
+
+    def _following_run(self, now: float) -> float:
+        """
+        Return the loop time of the tick after the one due at `self.next_run`, now that it ran.
+        """
+        if self._catch_up:
+            self._catch_up -= 1
+            return now
+        if self.schedule is not None:
+            return now + self.schedule.delay()
+        if self.fixed_rate:
+            return _next_run(self.next_run + self.seconds, now, self.seconds, self.on_missed)
+        return now + self.seconds
+
+    @property
+    def done(self) -> bool:
+        return self.max_repetitions is not None and self.ticks >= self.max_repetitions
+
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """
+        Return the next run time (timezone-aware, in `tz` for cron jobs), the number of
+        runs, failed runs, skipped ticks and ticks left to the process holding the job's
+        lease, and the duration in seconds of the last run.
+        """
+        return {
+            "next_run_at": self.next_run_at,
+            "runs": self.runner.runs,
+            "failures": self.runner.failures,
+            "skipped": self.runner.skipped,
+            "not_leader": self.runner.not_leader,
+            "running": self.runner.running,
+            "last_duration": self.runner.last_duration,
+        }
+
+
+class Scheduler:
+    """
+    Runs all its jobs from a single task that sleeps until the earliest next run in a
+    heap, so thousands of jobs cost one sleeping task rather than one each. Every due job
+    runs in its own task, referenced until it finishes.
+
+    Usage:
+        scheduler = Scheduler()
+
+        @repeat_every(seconds=10, scheduler=scheduler)
+        async def refresh():
+            ...
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            scheduler.start()
+            yield
+            await scheduler.shutdown()
+
+    With a `store`, the number of runs and the time of the last run of every job are
+    persisted. When the scheduler starts, they are loaded in a single batch, and the cron
+    runs missed since are made according to the `misfire` policy of each job.
+    """
+
+    def __init__(
+        self,
+        logger: typing.Optional[logging.Logger] = None,
+        store: typing.Optional[JobStore] = None,
+    ):
+        self.logger = logger
+        self.store = store
+        self._jobs: typing.Dict[str, Job] = {}
+        self._heap: typing.List[list] = []
+        self._counter = itertools.count()
+        self._tasks: "typing.Set[asyncio.Task]" = set()
+        self._loop_task: "typing.Optional[asyncio.Task]" = None
+        self._wakeup: typing.Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._loop_task is not None and not self._loop_task.done()
+
+    @property
+    def jobs(self) -> typing.List[Job]:
+        return list(self._jobs.values())
+
+    def get_job(self, name: str) -> typing.Optional[Job]:
+        return self._jobs.get(name)
+
+    def add_job(
+        self,
+        func: typing.Callable,
+        *,
+        seconds: typing.Optional[float] = None,
+        cron: typing.Optional[str] = None,
+        tz: typing.Union[str, tzinfo, None] = None,
+        name: typing.Optional[str] = None,
+        args: tuple = (),
+        kwargs: typing.Optional[dict] = None,
+        wait_first: bool = False,
+        fixed_rate: bool = False,
+        on_missed: str = "skip",
+        jitter: float = 0,
+        logger: typing.Optional[logging.Logger] = None,
+        raise_exceptions: bool = False,
+        max_repetitions: typing.Optional[int] = None,
+        max_instances: int = 1,
+        executor: typing.Optional[Executor] = None,
+        lock: typing.Optional[JobLock] = None,
+        lock_ttl: typing.Optional[float] = None,
+        misfire: str = "run_once",
+    ) -> Job:
+        """
+        Add a job running `func(*args, **kwargs)` every `seconds` seconds or on a `cron`
+        expression in the time zone `tz`, with the options of `repeat_every` and
+        `repeat_at`. It is named after the function unless `name` is given, and names must
+        be unique.
+
+        With `raise_exceptions`, a failing run removes the job instead of being only logged.
+        With a `lock`, the job only runs in the process holding its lease, named after the
+        job, which lasts `lock_ttl` seconds (twice `seconds`, or 60 for cron jobs).
+        With a store, `misfire` is what to do with the runs of a cron job missed while the
+        app was down: "run_once" for all of them, "run_all" of them, or "skip" them.
+        """
+        if (seconds is None) == (cron is None):
+            raise ValueError("Exactly one of seconds and cron must be given")
+        if on_missed not in MISSED_TICK_POLICIES:
+            raise ValueError(
+                f"on_missed must be one of {MISSED_TICK_POLICIES}, not '{on_missed}'"
+            )
+        if jitter < 0:
+            raise ValueError("jitter must be >= 0")
+        if fixed_rate and seconds is not None and seconds <= 0:
+            raise ValueError("seconds must be > 0 with fixed_rate")
+        if misfire not in MISFIRE_POLICIES:
+            raise ValueError(f"misfire must be one of {MISFIRE_POLICIES}, not '{misfire}'")
+        name = name or f"{func.__module__}.{func.__qualname__}"
+        if name in self._jobs:
+            raise ValueError(f"A job named '{name}' already exists")
+
+        if lock_ttl is None:
+            lock_ttl = 2 * seconds if seconds is not None else 60
+        runner = JobRunner(
+            func,
+            logger=logger or self.logger,
+            raise_exceptions=raise_exceptions,
+            max_instances=max_instances,
+            executor=executor,
+            lock=lock,
+            lock_ttl=lock_ttl,
+            name=name,
+        )
+        job = Job(
+            name,
+            func,
+            runner,
+            seconds=seconds,
+            cron=cron,
+            tz=tz,
+            args=args,
+            kwargs=kwargs,
+            wait_first=wait_first,
+            fixed_rate=fixed_rate,
+            on_missed=on_missed,
+            jitter=jitter,
+            max_repetitions=max_repetitions,
+            misfire=misfire,
+        )
+        self._jobs[name] = job
+        if self.running:
+            if self.store is None:
+                self._schedule(job, job._first_run(asyncio.get_running_loop().time()))
+            else:
+                self._spawn(self._restore_and_schedule([job]))
+        return job
+
+    def remove_job(self, name: str) -> None:
+        """
+        Remove a job. A run of it going on is not interrupted.
+        """
+        job = self._jobs.pop(name)
+        job.next_run = job.next_run_at = None
+        job._entry = None
+
+    def stats(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        """
+        Return the statistics of every job by name, see `Job.stats`.
+        """
+        return {name: job.stats() for name, job in self._jobs.items()}
+
+    def start(self) -> None:
+        """
+        Start running the jobs. Must be called from the event loop, e.g. in the app lifespan.
+        """
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if self.store is None:
+            now = loop.time()
+            for job in self._jobs.values():
+                self._schedule(job, job._first_run(now))
+        else:
+            self._spawn(self._restore_and_schedule(list(self._jobs.values())))
+        self._loop_task = loop.create_task(self._run_loop())
+
+    async def shutdown(self, wait: bool = True, timeout: typing.Optional[float] = None) -> None:
+        """
+        Stop scheduling runs. With `wait`, give the runs going on up to `timeout` seconds to
+        finish before cancelling them; otherwise cancel them right away. Then release the
+        job leases held by this process, so that another one takes over right away.
+        """
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        self._heap.clear()
+        for job in self._jobs.values():
+            job.next_run = job.next_run_at = None
+            job._entry = None
+
+        if wait:
+            loop = asyncio.get_running_loop()
+            deadline = None if timeout is None else loop.time() + timeout
+            tasks = self._pending_runs()
+            # A tick still going may start a background run, so wait until none is left.
+            while tasks:
+                remaining = None if deadline is None else max(deadline - loop.time(), 0)
+                _, pending = await asyncio.wait(tasks, timeout=remaining)
+                if pending:
+                    break
+                tasks = self._pending_runs()
+        tasks = self._pending_runs()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for job in self._jobs.values():
+            try:
+                await job.runner.release_lease()
+            except Exception as e:
+                if job.runner.logger is not None:
+                    job.runner.logger.exception(e)
+        if self.store is not None:
+            try:
+                await self.store.flush()
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.exception(e)
+
+    async def __aenter__(self) -> "Scheduler":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: typing.Any) -> None:
+        await self.shutdown()
+
+    def _pending_runs(self) -> "typing.Set[asyncio.Task]":
+        """
+        Return the ticks going on and the runs that jobs with `max_instances` above 1 started
+        in the background.
+        """
+        tasks = set(self._tasks)
+        for job in self._jobs.values():
+            tasks.update(job.runner._running)
+        return tasks
+
+    def _spawn(self, coroutine: typing.Awaitable) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _restore_and_schedule(self, jobs: typing.List[Job]) -> None:
+        """
+        Load the stored state of `jobs`, in one batch, and schedule them.
+        """
+        try:
+            states = await asyncio.gather(*(self.store.get(job.name) for job in jobs))
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.exception(e)
+            states = [None] * len(jobs)
+        if not self.running:
+            return
+        now = asyncio.get_running_loop().time()
+        for job, state in zip(jobs, states):
+            if self._jobs.get(job.name) is not job:
+                continue
+            if state is not None:
+                job.ticks = state.runs
+                if job.schedule is not None:
+                    job._catch_up = missed_runs(job.schedule, state, job.misfire)
+            if not job.done:
+                self._schedule(job, job._first_run(now))
+
+    def _schedule(self, job: Job, when: float) -> None:
+        delay = when - asyncio.get_running_loop().time()
+        job.next_run = when
+        if job.schedule is not None and job.schedule.last_fire is not None and delay > 0:
+            # The fire time itself, in the time zone of the job.
+            job.next_run_at = job.schedule.last_fire
+        else:
+            job.next_run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        if job.jitter:
+            when += random.uniform(0, job.jitter)
+        job._entry = [when, next(self._counter), job]
+        heapq.heappush(self._heap, job._entry)
+        if self._wakeup is not None and self._heap[0] is job._entry:
+            self._wakeup.set()
+
+    async def _run_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                job = entry[2]
+                if job._entry is not entry:
+                    # The job was removed or rescheduled since.
+                    continue
+                job._entry = None
+                job.ticks += 1
+                self._spawn(self._tick(job))
+
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _tick(self, job: Job) -> None:
+        due = time.time()
+        try:
+            ran = await job.runner.tick(*job.args, **job.kwargs)
+        except Exception:
+            # raise_exceptions: the job stops, its error is kept in `job.runner.last_error`.
+            if self._jobs.get(job.name) is job:
+                self.remove_job(job.name)
+            return
+        if self.store is not None and ran:
+            self.store.record(job.name, due, job.ticks)
+        if self._jobs.get(job.name) is job and not job.done and self.running:
+            self._schedule(job, job._following_run(asyncio.get_running_loop().time()))
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import typing
+
+from datetime import datetime
+from anyio import to_thread
+
+from .cron import CronSchedule
+from .locks import _LazyTable
+from .runner import _job_limiter, keep_running
+
+if typing.TYPE_CHECKING:
+    from ..session import FastAPISessionMaker
+
+MISFIRE_POLICIES = ("run_once", "run_all", "skip")
+
+
+class JobState(typing.NamedTuple):
+    """
+    The persisted state of a job: when its last run was due (a UNIX timestamp) and how
+    many runs it made.
+    """
+
+    last_run: float
+    runs: int
+
+
+def missed_runs(schedule: CronSchedule, state: JobState, misfire: str) -> int:
+    """
+    Returns the number of runs to make right away for the fire times of `schedule` missed
+    since the last run in `state`: none with the "skip" policy, at most one with
+    "run_once", and all of them (up to 1000) with "run_all".
+    """
+    if misfire == "skip":
+        return 0
+    last_run = datetime.fromtimestamp(state.last_run, schedule.tz)
+    limit = 1 if misfire == "run_once" else 1000
+    return len(schedule.fire_times_between(last_run, schedule.now(), limit=limit))
+
+
+class JobStore:
+    """
+    Keeps the state of scheduled jobs in a table (created if missing) of the database of
+    a `FastAPISessionMaker`, so that they survive restarts: `repeat_at` and `Scheduler`
+    catch up with the cron runs missed while the app was down, and `max_repetitions`
+    counts the runs made before.
+
+    Reads and writes are batched: the jobs asking for their state in the same event loop
+    iteration are loaded with one query per `chunk_size` jobs, and states recorded within
+    `flush_interval` seconds are written with one bulk upsert.
+    """
+
+    def __init__(
+        self,
+        session_maker: "FastAPISessionMaker",
+        table_name: str = "fastapi_utilities_jobs",
+        flush_interval: float = 1.0,
+        chunk_size: int = 500,
+        logger: typing.Optional[logging.Logger] = None,
+    ):
+        # Imported here, so that importing the package does not import SQLAlchemy.
+        from sqlalchemy import Column, Float, Integer, MetaData, String, Table
+
+        self.session_maker = session_maker
+        self.table = Table(
+            table_name,
+            MetaData(),
+            Column("name", String(255), primary_key=True),
+            Column("last_run", Float, nullable=False),
+            Column("runs", Integer, nullable=False),
+        )
+        self.flush_interval = flush_interval
+        self.chunk_size = chunk_size
+        self.logger = logger
+        self._lazy_table = _LazyTable(self.table)
+        self._waiting: "typing.Dict[str, typing.List[asyncio.Future]]" = {}
+        self._load_task: typing.Optional[asyncio.Future] = None
+        self._dirty: typing.Dict[str, JobState] = {}
+        self._flush_task: typing.Optional[asyncio.Future] = None
+
+    def load(self, names: typing.Sequence[str]) -> typing.Dict[str, JobState]:
+        """
+        Return the stored states of the jobs `names`, by name.
+        """
+        from sqlalchemy import select
+
+        table = self.table
+        states = {}
+        with self.session_maker.context_session() as session:
+            self._lazy_table.ensure(session)
+            for start in range(0, len(names), self.chunk_size):
+                rows = session.execute(
+                    select(table.c.name, table.c.last_run, table.c.runs).where(
+                        table.c.name.in_(names[start : start + self.chunk_size])
+                    )
+                )
+                for name, last_run, runs in rows:
+                    states[name] = JobState(last_run, runs)
+        return states
+
+    def save(self, states: typing.Mapping[str, JobState]) -> None:
+        """
+        Insert or update the states of jobs, by name.
+        """
+        with self.session_maker.bulk_writer(
+            self.table, chunk_size=self.chunk_size, upsert_on=["name"]
+        ) as writer:
+            self._lazy_table.ensure(writer.session)
+            writer.add_all(
+                {"name": name, "last_run": state.last_run, "runs": state.runs}
+                for name, state in states.items()
+            )
+
+    async def get(self, name: str) -> typing.Optional[JobState]:
+        """
+        Return the stored state of a job, None if it never ran. Batched with the other
+        calls made in the same event loop iteration.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(name, []).append(future)
+        if self._load_task is None:
+            self._load_task = keep_running(self._load_waiting())
+        return await future
+
+    async def _load_waiting(self) -> None:
+        # Let the other jobs starting in this iteration of the event loop ask as well.
+        await asyncio.sleep(0)
+        waiting, self._waiting = self._waiting, {}
+        self._load_task = None
+        try:
+            states = await to_thread.run_sync(self.load, list(waiting), limiter=_job_limiter())
+        except Exception as e:
+            for futures in waiting.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for name, futures in waiting.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(states.get(name))
+
+    def record(self, name: str, last_run: float, runs: int) -> None:
+        """
+        Record the state of a job, to be written within `flush_interval` seconds. Must be
+        called from the event loop.
+        """
+        self._dirty[name] = JobState(last_run, runs)
+        if self._flush_task is None:
+            self._flush_task = keep_running(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.exception(e)
+
+    async def flush(self) -> None:
+        """
+        Write the recorded states now.
+        """
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        try:
+            await to_thread.run_sync(self.save, dirty, limiter=_job_limiter())
+        except Exception:
+            # Keep the states for the next flush, unless newer ones were recorded since.
+            self._dirty = {**dirty, **self._dirty}
+            raise
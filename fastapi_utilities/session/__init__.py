@@ -1 +1,4 @@
 from .session import FastAPISessionMaker
+from .async_session import AsyncFastAPISessionMaker
+from .bulk import BulkWriter
+from .pool import PoolStats
@@ -0,0 +1,109 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from .pool import PoolMetrics, PoolStats
+
+
+class AsyncFastAPISessionMaker:
+    """
+    Async counterpart of `FastAPISessionMaker`, built on SQLAlchemy's asyncio extension.
+    """
+
+    def __init__(self, db_url: str, **engine_kwargs: Any):
+        """
+        `db_url` should be any sqlalchemy-compatible database URI with an async driver,
+        e.g. `postgresql+asyncpg://...` or `sqlite+aiosqlite:///...`.
+
+        Any other keyword argument is passed to `create_async_engine`, as for
+        `FastAPISessionMaker`.
+        """
+        self.db_url = db_url
+        self.engine_kwargs = engine_kwargs
+        self._cached_engine: AsyncEngine = None
+        self._cached_session_maker: sessionmaker = None
+        self._pool_metrics: PoolMetrics = None
+
+    def _get_session_maker(self) -> sessionmaker:
+        """
+        This will return the cached AsyncSession factory.
+        """
+        if self._cached_engine is None:
+            self._cached_engine = create_async_engine(self.db_url, **self.engine_kwargs)
+            self._pool_metrics = PoolMetrics(self._cached_engine.sync_engine)
+        if self._cached_session_maker is None:
+            self._cached_session_maker = sessionmaker(
+                bind=self._cached_engine,
+                class_=AsyncSession,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+        return self._cached_session_maker
+
+    @asynccontextmanager
+    async def context_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        An async context manager that commits the session on success and rolls it back
+        on error.
+
+        Usage:
+            session_maker = AsyncFastAPISessionMaker(database_uri)
+            async with session_maker.context_session() as session:
+                await session.execute(...)
+        """
+        db = self._get_session_maker()()
+        try:
+            yield db
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise e
+        finally:
+            await db.close()
+
+    async def get_db(self) -> AsyncIterator[AsyncSession]:
+        """
+        A FastAPI dependency that yields a session with the same semantics as `context_session`.
+
+        Usage:
+            @app.get("/users")
+            async def users(session: AsyncSession = Depends(session_maker.get_db)):
+                ...
+        """
+        async with self.context_session() as db:
+            yield db
+
+    def pool_stats(self) -> PoolStats:
+        """
+        This will return the connection pool statistics, all zeros before the engine is created.
+        """
+        if self._pool_metrics is None:
+            return PoolStats(0, 0, 0, 0, 0, 0.0, 0.0)
+        return self._pool_metrics.stats()
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """
+        Create the engine and open `connections` pooled connections, so that the first
+        requests do not pay for connecting. Call it at app startup; `connections` should
+        not exceed `pool_size + max_overflow`.
+        """
+        engine = self._get_session_maker().kw["bind"]
+        opened = []
+        try:
+            for _ in range(connections):
+                opened.append(await engine.connect())
+        finally:
+            for connection in opened:
+                await connection.close()
+
+    async def reset_session(self):
+        """
+        This will reset the sessionmaker and engine, and dispose of the engine's connection pool.
+        """
+        engine = self._cached_engine
+        self._cached_session_maker = None
+        self._cached_engine = None
+        self._pool_metrics = None
+        if engine is not None:
+            await engine.dispose()
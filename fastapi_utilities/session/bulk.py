@@ -0,0 +1,93 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+from sqlalchemy import Table, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+_UPSERT_DIALECTS = ("postgresql", "sqlite", "mysql", "mariadb")
+
+
+class BulkWriter:
+    """
+    Buffers rows and writes them in chunks with a single executemany `INSERT` per chunk,
+    bypassing the ORM unit of work and identity map.
+
+    With `upsert_on`, rows that conflict on those columns update the existing row instead
+    (`ON CONFLICT DO UPDATE` on PostgreSQL and SQLite, `ON DUPLICATE KEY UPDATE` on MySQL).
+    All rows of a chunk must have the same keys.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        table: Any,
+        chunk_size: int = 1000,
+        upsert_on: Optional[Sequence[str]] = None,
+        commit_every_chunk: bool = False,
+    ):
+        """
+        `table` is a `Table` or a mapped ORM class. Raises a ValueError if `upsert_on` is
+        given for a database whose dialect has no upsert, before any row is written.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self._dialect = session.get_bind().dialect.name
+        if upsert_on and self._dialect not in _UPSERT_DIALECTS:
+            raise ValueError(f"Upserts are not supported for the '{self._dialect}' dialect")
+        self.session = session
+        self.table: Table = getattr(table, "__table__", table)
+        self.chunk_size = chunk_size
+        self.upsert_on = list(upsert_on) if upsert_on else None
+        self.commit_every_chunk = commit_every_chunk
+        self.written = 0
+        self._buffer: List[Mapping[str, Any]] = []
+
+    def add(self, row: Mapping[str, Any]) -> None:
+        """
+        Buffer a row, writing the buffer once it holds `chunk_size` rows.
+        """
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def add_all(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """
+        Buffer rows from any iterable, e.g. a generator, without materializing it.
+        """
+        for row in rows:
+            self.add(row)
+
+    def flush(self) -> None:
+        """
+        Write the buffered rows.
+        """
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        self.session.execute(self._statement(rows[0]), rows)
+        self.written += len(rows)
+        if self.commit_every_chunk:
+            self.session.commit()
+
+    def _statement(self, sample_row: Mapping[str, Any]) -> Insert:
+        if self.upsert_on is None:
+            return insert(self.table)
+
+        dialect = self._dialect
+        update_columns = [name for name in sample_row if name not in self.upsert_on]
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            statement = dialect_insert(self.table)
+            if not update_columns:
+                return statement.on_conflict_do_nothing(index_elements=self.upsert_on)
+            set_: Dict[str, Any] = {name: statement.excluded[name] for name in update_columns}
+            return statement.on_conflict_do_update(index_elements=self.upsert_on, set_=set_)
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+
+        statement = dialect_insert(self.table)
+        columns = update_columns or self.upsert_on
+        return statement.on_duplicate_key_update(
+            {name: statement.inserted[name] for name in columns}
+        )
@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+
+class PoolStats(NamedTuple):
+    """
+    Connection pool statistics of a session maker.
+
+    `size` and `overflow` are reported by the pool (0 for pools that do not keep a fixed
+    size, e.g. `NullPool`). `checkouts`, `timeouts`, `total_wait` and `max_wait` are
+    measured since the engine was created: the number of connection checkouts, how many
+    of them gave up after `pool_timeout`, and the seconds spent waiting for them.
+    """
+
+    size: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.checkouts if self.checkouts else 0.0
+
+
+class PoolMetrics:
+    """
+    Collects `PoolStats` for an engine.
+
+    SQLAlchemy has no event that fires before a checkout starts waiting, so the pool's
+    `connect` method is wrapped to time it. `engine.dispose()` replaces the pool, and the
+    new one is wrapped in turn.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "engine_disposed", self._on_dispose)
+        self.instrument(engine.pool)
+
+    def instrument(self, pool: Pool) -> None:
+        """
+        Time the checkouts of `pool`.
+        """
+        connect = pool.connect
+
+        def timed_connect():
+            start = time.perf_counter()
+            try:
+                return connect()
+            except exc.TimeoutError:
+                with self._lock:
+                    self._timeouts += 1
+                raise
+            finally:
+                self._record_wait(time.perf_counter() - start)
+
+        pool.connect = timed_connect
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._checkouts += 1
+            self._total_wait += seconds
+            if seconds > self._max_wait:
+                self._max_wait = seconds
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self._checked_out += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._checked_out -= 1
+
+    def _on_dispose(self, engine: Engine) -> None:
+        self.instrument(engine.pool)
+
+    def stats(self) -> PoolStats:
+        pool = self.engine.pool
+        with self._lock:
+            return PoolStats(
+                size=_call(pool, "size"),
+                checked_out=self._checked_out,
+                overflow=max(0, _call(pool, "overflow")),
+                checkouts=self._checkouts,
+                timeouts=self._timeouts,
+                total_wait=self._total_wait,
+                max_wait=self._max_wait,
+            )
+
+
+def _call(pool: Pool, method: str) -> int:
+    """
+    Call a size method that only some pool classes implement. Others have no such
+    attribute, or one that is not a method (`SingletonThreadPool.size` is an int).
+    """
+    func: Optional[Callable[[], int]] = getattr(pool, method, None)
+    return func() if callable(func) else 0
@@ -1,33 +1,89 @@
+import itertools
+import threading
+import time
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+from sqlalchemy import create_engine, exc, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
+from .bulk import BulkWriter
+from .pool import PoolMetrics, PoolStats
+
+
+class _Replica:
+    """
+    A read replica, with its lazily created engine and its health.
+    """
+
+    def __init__(self, db_url: str):
+        self.db_url = db_url
+        self.engine: Engine = None
+        self.session_maker: sessionmaker = None
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.unhealthy_until <= time.monotonic()
+
 
 class FastAPISessionMaker:
     """
     This will allow us to create a cached session maker that can be used as context manager.
     """
 
-    def __init__(self, db_url: str):
+    def __init__(
+        self,
+        db_url: str,
+        replica_urls: Sequence[str] = (),
+        replica_retry_after: float = 30,
+        **engine_kwargs: Any,
+    ):
         """
         `db_url` should be any sqlalchemy-compatible database URI.
+
+        `replica_urls` are the URIs of read replicas used by `read_session`. A replica
+        that fails to connect is skipped for `replica_retry_after` seconds.
+
+        Any other keyword argument is passed to `create_engine`, e.g. `pool_size`,
+        `max_overflow`, `pool_timeout`, `pool_pre_ping`, `pool_recycle` or `query_cache_size`.
         """
         self.db_url = db_url
+        self.replica_retry_after = replica_retry_after
+        self.engine_kwargs = engine_kwargs
         self._cached_engine: Engine = None
         self._cached_session_maker: Session = None
+        self._pool_metrics: PoolMetrics = None
+        self._replicas = [_Replica(url) for url in replica_urls]
+        self._replica_cycle = itertools.cycle(range(len(self._replicas)))
+        self._replica_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+
+    def _get_session_maker(self) -> sessionmaker:
+        """
+        This will return the cached session factory of the primary database.
+
+        The engine is created once, even when many threads ask for it at the same time:
+        only the first call takes a lock, later calls return the cached factory directly.
+        """
+        session_maker = self._cached_session_maker
+        if session_maker is None:
+            with self._init_lock:
+                if self._cached_session_maker is None:
+                    engine = create_engine(self.db_url, **self.engine_kwargs)
+                    self._pool_metrics = PoolMetrics(engine)
+                    self._cached_engine = engine
+                    self._cached_session_maker = sessionmaker(
+                        autocommit=False, autoflush=False, bind=engine
+                    )
+                session_maker = self._cached_session_maker
+        return session_maker
 
     def _get_db(self):
         """
         This will return a cached db connection Session.
         """
-        if self._cached_engine is None:
-            self._cached_engine = create_engine(self.db_url)
-        if self._cached_session_maker is None:
-            self._cached_session_maker = sessionmaker(
-                autocommit=False, autoflush=False, bind=self._cached_engine
-            )
-        db = self._cached_session_maker()
+        db = self._get_session_maker()()
         try:
             yield db
             db.commit()
@@ -49,9 +105,181 @@ class FastAPISessionMaker:
         """
         yield from self._get_db()
 
+    @contextmanager
+    def bulk_writer(
+        self,
+        table: Any,
+        chunk_size: int = 1000,
+        upsert_on: Optional[Sequence[str]] = None,
+        commit_every_chunk: bool = False,
+    ):
+        """
+        A context manager that yields a `BulkWriter` for `table` (a `Table` or mapped class)
+        in a new session. Rows added to it are inserted `chunk_size` at a time with
+        executemany, or upserted on the `upsert_on` columns. Remaining rows are written
+        and the session committed on exit; with `commit_every_chunk`, every chunk is
+        also committed as soon as it is written.
+
+        Usage:
+            session_maker = FastAPISessionMaker(database_uri)
+            with session_maker.bulk_writer(User, chunk_size=5000) as writer:
+                for row in read_csv(path):
+                    writer.add({"id": row[0], "name": row[1]})
+        """
+        with self.context_session() as session:
+            writer = BulkWriter(
+                session,
+                table,
+                chunk_size=chunk_size,
+                upsert_on=upsert_on,
+                commit_every_chunk=commit_every_chunk,
+            )
+            yield writer
+            writer.flush()
+
+    def bulk_insert(
+        self,
+        table: Any,
+        rows: Iterable[Mapping[str, Any]],
+        chunk_size: int = 1000,
+        upsert_on: Optional[Sequence[str]] = None,
+        commit_every_chunk: bool = False,
+    ) -> int:
+        """
+        Stream `rows` (e.g. from a generator) into `table` with a `bulk_writer`, and return
+        the number of rows written.
+        """
+        with self.bulk_writer(
+            table,
+            chunk_size=chunk_size,
+            upsert_on=upsert_on,
+            commit_every_chunk=commit_every_chunk,
+        ) as writer:
+            writer.add_all(rows)
+        return writer.written
+
+    def _replica_session_maker(self, replica: _Replica) -> sessionmaker:
+        session_maker = replica.session_maker
+        if session_maker is None:
+            with self._init_lock:
+                if replica.session_maker is None:
+                    replica.engine = create_engine(replica.db_url, **self.engine_kwargs)
+                    replica.session_maker = sessionmaker(
+                        autocommit=False, autoflush=False, bind=replica.engine
+                    )
+                session_maker = replica.session_maker
+        return session_maker
+
+    def _mark_unhealthy(self, replica: _Replica) -> None:
+        replica.unhealthy_until = time.monotonic() + self.replica_retry_after
+
+    def _candidate_replicas(self) -> List[_Replica]:
+        """
+        Return the healthy replicas, starting with the next one in round-robin order.
+        """
+        if not self._replicas:
+            return []
+        with self._replica_lock:
+            start = next(self._replica_cycle)
+        ordered = self._replicas[start:] + self._replicas[:start]
+        return [replica for replica in ordered if replica.healthy]
+
+    @contextmanager
+    def read_session(self):
+        """
+        A context manager for read-only work, load-balanced across the read replicas.
+
+        Replicas are tried in round-robin order, skipping those that recently failed to
+        connect, and the primary database is used if none is available. The session is
+        never committed.
+
+        Usage:
+            session_maker = FastAPISessionMaker(primary_uri, replica_urls=[replica_uri])
+            with session_maker.read_session() as session:
+                session.query(...)
+        """
+        db = None
+        for replica in self._candidate_replicas():
+            db = self._replica_session_maker(replica)()
+            try:
+                db.connection()
+                break
+            except exc.DBAPIError:
+                db.close()
+                db = None
+                self._mark_unhealthy(replica)
+        if db is None:
+            db = self._get_session_maker()()
+        try:
+            yield db
+        finally:
+            db.rollback()
+            db.close()
+
+    def check_replicas(self) -> Dict[str, bool]:
+        """
+        Run `SELECT 1` on every read replica, update their health and return it by URI.
+        Useful to run periodically, e.g. with `repeat_every`.
+        """
+        health = {}
+        for replica in self._replicas:
+            try:
+                with self._replica_session_maker(replica)() as db:
+                    db.execute(text("SELECT 1"))
+            except exc.DBAPIError:
+                self._mark_unhealthy(replica)
+                health[replica.db_url] = False
+            else:
+                replica.unhealthy_until = 0.0
+                health[replica.db_url] = True
+        return health
+
+    def pool_stats(self) -> PoolStats:
+        """
+        This will return the connection pool statistics, all zeros before the engine is created.
+        """
+        if self._pool_metrics is None:
+            return PoolStats(0, 0, 0, 0, 0, 0.0, 0.0)
+        return self._pool_metrics.stats()
+
+    def warm_up(self, connections: int = 1) -> None:
+        """
+        Create the engines and open `connections` pooled connections to the primary and to
+        every read replica, so that the first requests do not pay for connecting. Call it
+        at app startup; `connections` should not exceed `pool_size + max_overflow`.
+        Replicas that cannot be reached are marked unhealthy instead of raising.
+        """
+        engines = [(None, self._get_session_maker().kw["bind"])]
+        for replica in self._replicas:
+            engines.append((replica, self._replica_session_maker(replica).kw["bind"]))
+
+        for replica, engine in engines:
+            opened = []
+            try:
+                for _ in range(connections):
+                    opened.append(engine.connect())
+            except exc.DBAPIError:
+                if replica is None:
+                    raise
+                self._mark_unhealthy(replica)
+            finally:
+                for connection in opened:
+                    connection.close()
+
     def reset_session(self):
         """
-        This will reset the sessionmaker and engine.
+        This will reset the sessionmaker and engine, and dispose of the engines' connection
+        pools. Connections still checked out are closed when they are returned.
         """
-        self._cached_session_maker = None
-        self._cached_engine = None
+        with self._init_lock:
+            engines = [self._cached_engine]
+            self._cached_session_maker = None
+            self._cached_engine = None
+            self._pool_metrics = None
+            for replica in self._replicas:
+                engines.append(replica.engine)
+                replica.session_maker = None
+                replica.engine = None
+        for engine in engines:
+            if engine is not None:
+                engine.dispose()
@@ -1 +1,19 @@
-from .middleware import add_timer_middleware
+import typing
+
+from .._lazy import lazy_exports
+from .histogram import LatencyHistogram, RouteMetrics, TimerMetrics, exponential_buckets
+from .profiling import SlowRequestProfiler
+from .spans import request_spans, timed, timing_span
+
+# The middleware imports FastAPI, so it is only imported when used.
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "RequestTiming": ".middleware",
+        "TimerMiddleware": ".middleware",
+        "add_timer_middleware": ".middleware",
+    },
+)
+
+if typing.TYPE_CHECKING:
+    from .middleware import RequestTiming, TimerMiddleware, add_timer_middleware
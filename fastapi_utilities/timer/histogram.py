@@ -0,0 +1,160 @@
+import bisect
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Bucket upper bounds in milliseconds, from 1 ms to 10 s.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    1, 2.5, 5, 10, 25, 50, 75, 100, 150, 250, 350, 500, 750, 1000, 1500, 2500, 5000, 10000,
+)
+
+
+def exponential_buckets(start: float, factor: float, count: int) -> Tuple[float, ...]:
+    """
+    Return `count` bucket bounds starting at `start`, each `factor` times the previous one.
+    With a small factor (e.g. 1.1) this gives HDR-style buckets with a bounded relative
+    error at every scale.
+    """
+    if start <= 0 or factor <= 1 or count < 1:
+        raise ValueError("start must be > 0, factor > 1 and count >= 1")
+    return tuple(start * factor**i for i in range(count))
+
+
+class LatencyHistogram:
+    """
+    A fixed-bucket latency histogram (in milliseconds) with percentile estimates.
+
+    Recording is O(log buckets) and memory does not grow with the number of requests.
+    Percentiles are interpolated linearly within the bucket they fall in, so their error
+    is bounded by the bucket width.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds: List[float] = sorted(buckets)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Return the estimated `q`-th percentile (0 - 100), 0 if nothing was recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3),
+            "min": round(self.min if self.count else 0.0, 3),
+            "max": round(self.max, 3),
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+        }
+
+
+class RouteMetrics:
+    """
+    The histograms of one route: total time until the last body chunk was sent, handler
+    time until the response started, and time to the first body byte, plus the total
+    number of response body bytes.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.total = LatencyHistogram(buckets)
+        self.handler = LatencyHistogram(buckets)
+        self.first_byte = LatencyHistogram(buckets)
+        self.response_bytes = 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            **self.total.summary(),
+            "handler": self.handler.summary(),
+            "first_byte": self.first_byte.summary(),
+            "response_bytes": self.response_bytes,
+        }
+
+
+class TimerMetrics:
+    """
+    Latency histograms of a FastAPI app, keyed by "METHOD route-template" (e.g.
+    "GET /items/{item_id}") so that their number stays bounded. Requests that match no
+    route are grouped under "METHOD <unmatched>".
+    """
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        self.buckets = tuple(buckets) if buckets is not None else DEFAULT_BUCKETS
+        self._routes: Dict[str, RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        key: str,
+        milliseconds: float,
+        handler: Optional[float] = None,
+        first_byte: Optional[float] = None,
+        response_bytes: int = 0,
+    ) -> None:
+        """
+        Record a request that took `milliseconds` in total, of which `handler` ms until the
+        response started and `first_byte` ms until the first body byte was sent.
+        """
+        with self._lock:
+            route = self._routes.get(key)
+            if route is None:
+                route = self._routes[key] = RouteMetrics(self.buckets)
+            route.total.record(milliseconds)
+            if handler is not None:
+                route.handler.record(handler)
+            if first_byte is not None:
+                route.first_byte.record(first_byte)
+            route.response_bytes += response_bytes
+
+    def route(self, key: str) -> Optional[RouteMetrics]:
+        return self._routes.get(key)
+
+    def histogram(self, key: str) -> Optional[LatencyHistogram]:
+        """
+        Return the total time histogram of a route.
+        """
+        route = self._routes.get(key)
+        return route.total if route is not None else None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return count, mean, min, max, p50, p95 and p99 (in ms) of the total time for every
+        route, along with the same summary for the "handler" and "first_byte" phases and
+        the total "response_bytes".
+        """
+        with self._lock:
+            return {key: route.summary() for key, route in self._routes.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
@@ -2,24 +2,296 @@
 Based on https://github.com/dmontagu/fastapi-utils/blob/master/fastapi_utils/timing.py
 """
 
+import atexit
+import queue
 import time
-from typing import Callable
-from fastapi import FastAPI, Request
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, NamedTuple, Optional, Sequence
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
+from .histogram import TimerMetrics
+from .profiling import SlowRequestProfiler
+from .spans import _request_spans, server_timing_header
+
 TIMER_PREFIX = "(fastapi-utilities)"
 
 
+class _ForwardHandler(logging.Handler):
+    """
+    Hands records taken off the log queue to the target logger, with its current handlers.
+    """
+
+    def __init__(self, target: logging.Logger):
+        super().__init__()
+        self.target = target
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        self.target.handle(record)
+        return True
+
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    A QueueHandler that leaves formatting to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _queued_logger(target: logging.Logger) -> logging.Logger:
+    """
+    Return a logger whose records are emitted by `target` from a background thread, one
+    logger and thread per target. Records below the level of `target` are dropped before
+    they are queued, as `target` would drop them.
+    """
+    logger = logging.getLogger(f"fastapi_utilities.timer.queue.{target.name}")
+    if logger.handlers:
+        return logger
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = _RecordQueueHandler(log_queue)
+    handler.addFilter(lambda record: target.isEnabledFor(record.levelno))
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+
+    listener = QueueListener(log_queue, _ForwardHandler(target))
+    listener.start()
+    atexit.register(listener.stop)
+    return logger
+
+
+class RequestTiming(NamedTuple):
+    """
+    The phases of a request, in milliseconds since the middleware received it.
+
+    `handler` is the time until the response started (status and headers sent),
+    `first_byte` the time until the first body byte was sent and `total` the time until
+    the last body chunk was sent. `queue` is the time the request spent before reaching
+    the app, taken from an `X-Request-Start` header set by the proxy, if any.
+    """
+
+    queue: Optional[float]
+    handler: Optional[float]
+    first_byte: Optional[float]
+    total: float
+    status: Optional[int]
+    response_bytes: int
+    spans: Dict[str, float]
+
+
+def _queue_time(scope: Scope) -> Optional[float]:
+    """
+    Parse an `X-Request-Start` header ("t=<epoch>" or "<epoch>", in s, ms or µs) into
+    the milliseconds elapsed since then.
+    """
+    for name, value in scope.get("headers", ()):
+        if name == b"x-request-start":
+            try:
+                started = float(value.decode("latin-1").strip().lstrip("t="))
+            except ValueError:
+                return None
+            if started > 1e14:
+                started /= 1e6
+            elif started > 1e11:
+                started /= 1e3
+            return max(0.0, (time.time() - started) * 1000)
+    return None
+
+
+class TimerMiddleware:
+    """
+    A pure ASGI middleware that times requests, records them in `metrics` and logs them.
+
+    Besides the total time until the last body chunk was sent, it records the handler
+    time, the time to the first body byte, the queueing time reported by the proxy and
+    the response size (see `RequestTiming`), so slow handlers can be told apart from slow
+    serialization, streaming or clients.
+
+    Spans timed with `timing_span` or `timed` during the request are logged too, and with
+    `server_timing` they are sent back in a `Server-Timing` header. With a `profiler`, a
+    sample of requests is profiled and the profiles of slow ones are written to disk.
+
+    A request is logged if it is one of every `log_every` requests (0 disables this) or if
+    it took at least `slow_threshold` milliseconds.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics: TimerMetrics,
+        logger: logging.Logger,
+        show_avg: bool = False,
+        reset_after: int = 100000,
+        log_every: int = 1,
+        slow_threshold: Optional[float] = None,
+        server_timing: bool = False,
+        profiler: Optional[SlowRequestProfiler] = None,
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.logger = logger
+        self.show_avg = show_avg
+        self.reset_after = reset_after
+        self.log_every = log_every
+        self.slow_threshold = slow_threshold
+        self.server_timing = server_timing
+        self.profiler = profiler
+        self.request_counter = 0
+        self.total_response_time = 0.0
+        self._seen = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter_ns()
+        root_path = scope.get("root_path", "")
+        queue = _queue_time(scope)
+        handler_ns: Optional[int] = None
+        first_byte_ns: Optional[int] = None
+        status: Optional[int] = None
+        response_bytes = 0
+        spans: Dict[str, float] = {}
+        spans_token = _request_spans.set(spans)
+        profile = self.profiler.start() if self.profiler is not None else None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal handler_ns, first_byte_ns, status, response_bytes
+            if message["type"] == "http.response.start":
+                handler_ns = time.perf_counter_ns() - start_time
+                status = message["status"]
+                if self.server_timing:
+                    value = server_timing_header(spans, handler_ns / 1e6)
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", value))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if first_byte_ns is None and (body or not message.get("more_body", False)):
+                    first_byte_ns = time.perf_counter_ns() - start_time
+                response_bytes += len(body)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_spans.reset(spans_token)
+            timing = RequestTiming(
+                queue=queue,
+                handler=handler_ns / 1e6 if handler_ns is not None else None,
+                first_byte=first_byte_ns / 1e6 if first_byte_ns is not None else None,
+                total=(time.perf_counter_ns() - start_time) / 1e6,
+                status=status,
+                response_bytes=response_bytes,
+                spans=spans,
+            )
+            if profile is not None:
+                profile_path = self.profiler.stop(
+                    profile, scope["method"], scope["path"], timing.total
+                )
+                if profile_path is not None:
+                    self.logger.info("%s Profile written to %s", TIMER_PREFIX, profile_path)
+            self._record(scope, timing, root_path)
+
+    def _record(self, scope: Scope, timing: RequestTiming, root_path: str = "") -> None:
+        process_time = timing.total
+        route = scope.get("route")
+        if route is None or not hasattr(route, "path"):
+            route_path = "<unmatched>"
+        else:
+            # Routers of mounted apps extend the root path with the mount path, which the
+            # route template does not include.
+            mount_path = scope.get("root_path", "")
+            if mount_path.startswith(root_path):
+                mount_path = mount_path[len(root_path) :]
+            route_path = mount_path + route.path
+        self.metrics.record(
+            f"{scope['method']} {route_path}",
+            process_time,
+            handler=timing.handler,
+            first_byte=timing.first_byte,
+            response_bytes=timing.response_bytes,
+        )
+
+        self._seen += 1
+        sampled = self.log_every > 0 and self._seen % self.log_every == 0
+        slow = self.slow_threshold is not None and process_time >= self.slow_threshold
+        if sampled or slow:
+            self.logger.info(
+                '%s "%s - %s" :: Time Taken :: %.2f ms :: %s',
+                TIMER_PREFIX,
+                scope["method"],
+                scope["path"],
+                process_time,
+                _Phases(timing),
+            )
+
+        if self.show_avg:
+            self.request_counter += 1
+            self.total_response_time += process_time
+            if sampled or slow:
+                self.logger.info(
+                    ":: Average Response Time :: %.2f ms",
+                    self.total_response_time / self.request_counter,
+                )
+
+            if self.request_counter % self.reset_after == 0:
+                self.request_counter = 0
+                self.total_response_time = 0.0
+
+
+class _Phases:
+    """
+    Formats the phases of a `RequestTiming` lazily, only when the record is emitted.
+    """
+
+    def __init__(self, timing: RequestTiming):
+        self.timing = timing
+
+    def __str__(self) -> str:
+        timing = self.timing
+        parts = []
+        if timing.queue is not None:
+            parts.append(f"queue {timing.queue:.2f} ms")
+        if timing.handler is not None:
+            parts.append(f"handler {timing.handler:.2f} ms")
+        if timing.first_byte is not None:
+            parts.append(f"first byte {timing.first_byte:.2f} ms")
+        parts.append(f"{timing.response_bytes} bytes")
+        parts.extend(f"{name} {duration:.2f} ms" for name, duration in timing.spans.items())
+        return ", ".join(parts)
+
+
 def add_timer_middleware(
     app: FastAPI,
     show_avg: bool = False,
     reset_after: int = 100000,
-) -> None:
+    buckets: Optional[Sequence[float]] = None,
+    metrics_path: Optional[str] = None,
+    log_every: int = 1,
+    slow_threshold: Optional[float] = None,
+    queue_logs: bool = False,
+    server_timing: bool = False,
+    profile_dir: Optional[str] = None,
+    profile_threshold: float = 1000,
+    profile_sample_rate: float = 0.01,
+) -> TimerMetrics:
     """
     Add a middleware to the FastAPI app that logs the time taken to process a request.
     Optionally, also logs the average response time.
     The average response time is reset after every (reset_after)100,000 requests.
 
+    Request times are also recorded in per-route latency histograms, keyed by the route
+    template rather than the raw path. They are returned as a `TimerMetrics` (also stored
+    as `app.state.timer_metrics`), whose `snapshot()` gives p50/p95/p99 for every route.
+
+    The middleware is a plain ASGI middleware, so it adds little per-request overhead and
+    does not interfere with streaming responses.
+
     ::Params::
     ----------
     app: FastAPI
@@ -28,34 +300,54 @@ def add_timer_middleware(
         Whether to show the average response time in the logs.
     reset_after: int (default 100000)
         The number of requests after which to reset the average response time.
+    buckets: Sequence[float] (default None)
+        The histogram bucket upper bounds in milliseconds, e.g. `exponential_buckets(1, 1.2, 50)`.
+        Defaults to `DEFAULT_BUCKETS`, from 1 ms to 10 s.
+    metrics_path: str (default None)
+        If given, serve the latency snapshot as JSON at this path, e.g. "/metrics/latency".
+    log_every: int (default 1)
+        Log one in every `log_every` requests. 0 logs only slow requests.
+    slow_threshold: float (default None)
+        Always log requests that took at least this many milliseconds.
+    queue_logs: bool (default False)
+        Hand log records to a background thread instead of writing them from the event loop.
+    server_timing: bool (default False)
+        Send the spans of every request, timed with `timing_span` or `timed`, and the time
+        until the response started in a `Server-Timing` header.
+    profile_dir: str (default None)
+        If given, profile a sample of requests with cProfile and write the profiles of those
+        that took at least `profile_threshold` ms to this directory.
+    profile_threshold: float (default 1000)
+        The time in milliseconds above which a profiled request is written to disk.
+    profile_sample_rate: float (default 0.01)
+        The fraction of requests to profile, one at a time.
     """
 
     logger = logging.getLogger("uvicorn")
+    if queue_logs:
+        logger = _queued_logger(logger)
+    metrics = TimerMetrics(buckets)
+    profiler = None
+    if profile_dir is not None:
+        profiler = SlowRequestProfiler(profile_dir, profile_threshold, profile_sample_rate)
+    app.state.timer_metrics = metrics
 
-    request_counter = 0
-    total_response_time = 0.0
-
-    @app.middleware("http")
-    async def timer_middleware(request: Request, call_next):
-        nonlocal request_counter, total_response_time
+    if metrics_path is not None:
 
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = (time.time() - start_time) * 1000
-        logger.info(
-            f'{TIMER_PREFIX} "{request.method} - {request.url.path}" :: Time Taken :: {process_time:.2f} ms'
-        )
-
-        if show_avg:
-            request_counter += 1
-            total_response_time += process_time
-            average_response_time = (
-                total_response_time / request_counter if request_counter > 0 else 0
-            )
-            logger.info(f":: Average Response Time :: {average_response_time:.2f} ms")
+        def latency_metrics():
+            return metrics.snapshot()
 
-            if request_counter % reset_after == 0:
-                request_counter = 0
-                total_response_time = 0.0
+        app.add_api_route(metrics_path, latency_metrics, include_in_schema=False)
 
-        return response
+    app.add_middleware(
+        TimerMiddleware,
+        metrics=metrics,
+        logger=logger,
+        show_avg=show_avg,
+        reset_after=reset_after,
+        log_every=log_every,
+        slow_threshold=slow_threshold,
+        server_timing=server_timing,
+        profiler=profiler,
+    )
+    return metrics
@@ -0,0 +1,64 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+
+class SlowRequestProfiler:
+    """
+    Profiles a sample of requests with cProfile and writes the profile of those that
+    took at least `threshold` ms to `directory`, as `.prof` files readable with `pstats`
+    or snakeviz.
+
+    Only one request is profiled at a time, since a profiler slows everything down and
+    only one can be active per thread. cProfile sees the thread it was enabled in: for
+    async endpoints that is the event loop, so concurrent requests may show up in the
+    profile as well; the work of sync endpoints, run in a thread pool, is not included.
+    """
+
+    def __init__(self, directory: str, threshold: float, sample_rate: float = 0.01):
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """
+        Start profiling the current request if it is sampled and no other request is being
+        profiled. Return the profiler to pass to `stop`, or None.
+        """
+        if random.random() >= self.sample_rate or not self._lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger or coverage tool) is already active.
+            self._lock.release()
+            return None
+        return profiler
+
+    def stop(
+        self, profiler: cProfile.Profile, method: str, path: str, milliseconds: float
+    ) -> Optional[str]:
+        """
+        Stop the profiler and, if the request was slow, write its profile. Return the path
+        of the written file, if any.
+        """
+        try:
+            profiler.disable()
+        finally:
+            self._lock.release()
+        if milliseconds < self.threshold:
+            return None
+        slug = re.sub(r"[^A-Za-z0-9_-]+", "_", path).strip("_")[:80] or "root"
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{milliseconds:.0f}ms.prof"
+        profile_path = os.path.join(self.directory, filename)
+        profiler.dump_stats(profile_path)
+        return profile_path
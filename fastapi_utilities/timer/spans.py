@@ -0,0 +1,91 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Span durations (ms) of the current request, by name. The dict is created by the timer
+# middleware and shared with the threads and tasks the request spawns.
+_request_spans: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "fastapi_utilities_request_spans", default=None
+)
+
+
+def request_spans() -> Dict[str, float]:
+    """
+    Return a copy of the span durations (ms) recorded so far in the current request.
+    """
+    spans = _request_spans.get()
+    return dict(spans) if spans is not None else {}
+
+
+@contextmanager
+def timing_span(name: str) -> Iterator[None]:
+    """
+    Time the block as the span `name` of the current request. Spans with the same name
+    are summed. Outside a request timed by the timer middleware, this does nothing.
+
+    Usage:
+        with timing_span("db"):
+            rows = session.execute(query).all()
+    """
+    spans = _request_spans.get()
+    if spans is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans[name] = spans.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def timed(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    A decorator that times every call of a sync or async function as a span, named after
+    the function unless `name` is given.
+
+    Usage:
+        @timed("render")
+        def render(items):
+            ...
+    """
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with timing_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timing_span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def server_timing_header(spans: Dict[str, float], app: Optional[float] = None) -> bytes:
+    """
+    Format spans as a `Server-Timing` header value, e.g. `db;dur=12.1, app;dur=15.3`,
+    where `app` is the time until the response started.
+    """
+    metrics = [f"{_token(name)};dur={duration:.1f}" for name, duration in spans.items()]
+    if app is not None:
+        metrics.append(f"app;dur={app:.1f}")
+    return ", ".join(metrics).encode("latin-1")
+
+
+def _token(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_.!#$%&'*+^`|~" else "_" for c in name) or "_"
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import Column, Integer, func, select
+from sqlalchemy.orm import declarative_base
+
+pytest.importorskip("aiosqlite")
+
+import pytest_asyncio
+from fastapi_utilities import AsyncFastAPISessionMaker
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    sm = AsyncFastAPISessionMaker(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite3'}")
+    async with sm.context_session() as session:
+        await session.run_sync(lambda s: Base.metadata.create_all(s.connection()))
+    yield sm
+    await sm.reset_session()
+
+
+async def count_items(sm: AsyncFastAPISessionMaker) -> int:
+    async with sm.context_session() as session:
+        return await session.scalar(select(func.count()).select_from(Item))
+
+
+@pytest.mark.asyncio
+async def test_async_session(session_maker):
+    async with session_maker.context_session() as session:
+        session.add(Item(id=1))
+    assert await count_items(session_maker) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_session_raise_error(session_maker):
+    with pytest.raises(ValueError):
+        async with session_maker.context_session() as session:
+            session.add(Item(id=1))
+            await session.flush()
+            raise ValueError("rollback")
+    assert await count_items(session_maker) == 0
+
+
+@pytest.mark.asyncio
+async def test_async_session_get_db(session_maker):
+    dependency = session_maker.get_db()
+    session = await dependency.__anext__()
+    session.add(Item(id=2))
+    with pytest.raises(StopAsyncIteration):
+        await dependency.__anext__()
+    assert await count_items(session_maker) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_session_warm_up(session_maker):
+    checkouts = session_maker.pool_stats().checkouts
+    await session_maker.warm_up(connections=2)
+    assert session_maker.pool_stats().checkouts == checkouts + 2
+    assert session_maker.pool_stats().checked_out == 0
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from fastapi_utilities.repeat import batch_every
+
+batches = []
+
+
+@batch_every(seconds=0.05, max_size=10)
+async def double(items):
+    batches.append(list(items))
+    return [item * 2 for item in items]
+
+
+@pytest.mark.asyncio
+async def test_batch_every_size_and_time():
+    batches.clear()
+    results = await asyncio.gather(*(double(i) for i in range(25)))
+    assert results == [i * 2 for i in range(25)]
+    # Two full batches right away, then the rest after `seconds`.
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert double.__name__ == "double"
+    assert double.batches == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_every_sync_handler_and_flush():
+    threads = []
+
+    @batch_every(seconds=10)
+    def save(items):
+        threads.append(threading.current_thread())
+
+    futures = [await save.add(i) for i in range(3)]
+    assert len(save) == 3
+    await save.flush()
+    assert [future.result() for future in futures] == [None, None, None]
+    assert threads and threads[0] is not threading.main_thread()
+    await save.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_every_errors(caplog):
+    @batch_every(seconds=0.01, logger=logging.getLogger("test"))
+    async def fail(items):
+        raise RuntimeError("down")
+
+    @batch_every(seconds=0.01)
+    async def wrong_length(items):
+        return []
+
+    with pytest.raises(RuntimeError):
+        await fail(1)
+    assert "down" in caplog.text
+    with pytest.raises(ValueError):
+        await wrong_length(1)
+
+
+@pytest.mark.asyncio
+async def test_batch_every_backpressure():
+    release = asyncio.Event()
+
+    @batch_every(seconds=0.01, max_size=2, max_queue=4)
+    async def slow(items):
+        await release.wait()
+
+    futures = [slow.add_nowait(i) for i in range(4)]
+    with pytest.raises(asyncio.QueueFull):
+        slow.add_nowait(4)
+    adding = asyncio.ensure_future(slow.add(4))
+    await asyncio.sleep(0.05)
+    assert not adding.done()
+
+    release.set()
+    await asyncio.gather(*futures)
+    await asyncio.wait_for(adding, 1)
+    await slow.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_every_close_waits_for_the_batch_being_handled():
+    @batch_every(seconds=0.01)
+    async def slow(items):
+        await asyncio.sleep(0.1)
+        return items
+
+    handled = [slow.add_nowait(i) for i in range(2)]
+    await asyncio.sleep(0.03)
+    assert len(slow) == 0
+    waiting = slow.add_nowait(2)
+    await slow.close()
+    assert [future.result() for future in handled + [waiting]] == [0, 1, 2]
+
+    # If the worker is cancelled anyway, the futures of its batch are cancelled too.
+    handled = slow.add_nowait(3)
+    await asyncio.sleep(0.03)
+    slow._worker.cancel()
+    await asyncio.sleep(0)
+    assert handled.cancelled()
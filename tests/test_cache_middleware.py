@@ -0,0 +1,97 @@
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from fastapi_utilities import add_cache_middleware
+
+app = FastAPI()
+cache = add_cache_middleware(app, ttl=60, vary_headers=["Accept-Language"])
+
+calls = {"items": 0, "private": 0}
+
+
+@app.get("/me")
+def me(request: Request):
+    return {"user": request.headers.get("Authorization")}
+
+
+@app.get("/public")
+def public(request: Request, response: Response):
+    response.headers["Cache-Control"] = "public"
+    return {"user": request.headers.get("Authorization")}
+
+
+@app.get("/negotiated")
+def negotiated(request: Request, response: Response, vary: str = "Accept-Encoding"):
+    response.headers["Vary"] = vary
+    return {"encoding": request.headers.get("Accept-Encoding"), "vary": vary}
+
+
+@app.get("/items")
+def items(page: int = 1):
+    calls["items"] += 1
+    return {"page": page, "calls": calls["items"]}
+
+
+@app.get("/private")
+def private(response: Response):
+    calls["private"] += 1
+    response.headers["Cache-Control"] = "private"
+    return {"calls": calls["private"]}
+
+
+client = TestClient(app)
+
+
+def test_cache_middleware() -> None:
+    cache.clear()
+    first = client.get("/items")
+    second = client.get("/items")
+    assert first.json() == second.json()
+    assert first.headers["etag"] == second.headers["etag"]
+    assert "age" in second.headers
+    assert cache.info().hits == 1
+
+    assert client.get("/items", params={"page": 2}).json()["page"] == 2
+    assert client.get("/items", headers={"Accept-Language": "fr"}).json() != first.json()
+    assert client.head("/items").status_code == 200
+
+
+def test_cache_middleware_not_modified() -> None:
+    cache.clear()
+    etag = client.get("/items").headers["etag"]
+    response = client.get("/items", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_cache_middleware_cache_control() -> None:
+    cache.clear()
+    first = client.get("/items").json()
+    assert client.get("/items", headers={"Cache-Control": "no-cache"}).json() != first
+    assert client.get("/private").json() != client.get("/private").json()
+
+
+def test_cache_middleware_credentials() -> None:
+    cache.clear()
+    assert client.get("/me", headers={"Authorization": "alice"}).json() == {"user": "alice"}
+    assert client.get("/me", headers={"Authorization": "bob"}).json() == {"user": "bob"}
+    assert client.get("/me", headers={"Cookie": "session=bob"}).json() == {"user": None}
+    assert len(cache) == 0
+
+    # Responses marked public are shared, whoever asked for them.
+    assert client.get("/public", headers={"Authorization": "alice"}).json() == {"user": "alice"}
+    assert client.get("/public", headers={"Authorization": "bob"}).json() == {"user": "alice"}
+
+
+def test_cache_middleware_response_vary() -> None:
+    cache.clear()
+    gzip = client.get("/negotiated", headers={"Accept-Encoding": "gzip"}).json()
+    cached = client.get("/negotiated", headers={"Accept-Encoding": "gzip"})
+    assert cached.json() == gzip
+    assert "age" in cached.headers
+    other = client.get("/negotiated", headers={"Accept-Encoding": "br"})
+    assert other.json()["encoding"] == "br"
+    assert "age" not in other.headers
+
+    client.get("/negotiated", params={"vary": "*"})
+    assert len(cache) == 1
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from dateutil import tz
+
+from fastapi_utilities.repeat import CronSchedule
+from fastapi_utilities.repeat.repeat_at import get_delta
+
+NEW_YORK = tz.gettz("America/New_York")
+
+
+def test_cron_schedule_delay():
+    schedule = CronSchedule("* * * * *")
+    assert 0 <= schedule.delay() <= 60
+    first = schedule.last_fire
+    # A run ending within its minute is not scheduled again for that minute.
+    assert schedule.next_fire() == first + timedelta(minutes=1)
+
+
+def test_get_delta_uses_the_time_zone():
+    now = datetime.now(timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+    expected = (midnight - now).total_seconds()
+    assert get_delta("0 0 * * *", tz="UTC") == pytest.approx(expected, abs=1)
+
+
+def test_cron_schedule_invalid():
+    with pytest.raises(ValueError):
+        CronSchedule("invalid")
+    with pytest.raises(ValueError):
+        CronSchedule("* * * * *", tz="Nowhere/Somewhere")
+
+
+def test_cron_schedule_next_fire_times():
+    schedule = CronSchedule("0 */6 * * *", tz=timezone.utc)
+    after = datetime(2026, 1, 1, 1, tzinfo=timezone.utc)
+    assert [fire.hour for fire in schedule.next_fire_times(5, after=after)] == [6, 12, 18, 0, 6]
+    assert schedule.last_fire is None
+
+
+def test_cron_schedule_daylight_saving_time():
+    spring_forward = CronSchedule("30 2 * * *", tz="America/New_York")
+    fires = spring_forward.next_fire_times(3, after=datetime(2026, 3, 7, 12, tzinfo=NEW_YORK))
+    # 02:30 does not exist on March 8th: the run happens once, shifted by the hour skipped.
+    assert [fire.day for fire in fires] == [8, 9, 10]
+    assert fires[0] == datetime(2026, 3, 8, 7, 30, tzinfo=timezone.utc)
+
+    fall_back = CronSchedule("30 1 * * *", tz=NEW_YORK)
+    fires = fall_back.next_fire_times(3, after=datetime(2026, 10, 31, 12, tzinfo=NEW_YORK))
+    # 01:30 happens twice on November 1st, the job runs once, the first time.
+    assert [fire.day for fire in fires] == [1, 2, 3]
+    assert fires[0].utcoffset() == timedelta(hours=-4)
+
+
+def test_cron_schedule_skipped_time_is_shifted_by_the_gap():
+    schedule = CronSchedule("30 2 * * *", tz="Europe/Paris")
+    fire = schedule.next_fire(after=datetime(2026, 3, 29, 1, tzinfo=tz.gettz("Europe/Paris")))
+    assert (fire.hour, fire.minute) == (3, 30)
+    assert fire == datetime(2026, 3, 29, 1, 30, tzinfo=timezone.utc)
+    assert schedule.next_fire(after=fire) == datetime(2026, 3, 30, 0, 30, tzinfo=timezone.utc)
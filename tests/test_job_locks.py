@@ -0,0 +1,123 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from fastapi_utilities import FastAPISessionMaker, Scheduler, repeat_every
+from fastapi_utilities.repeat import DatabaseLock, FileLock
+from fastapi_utilities.repeat.locks import lock_owner
+
+
+@pytest.fixture(params=["file", "database"])
+def job_lock(request, tmp_path):
+    if request.param == "file":
+        yield FileLock(str(tmp_path / "jobs.lock"))
+    else:
+        session_maker = FastAPISessionMaker(f"sqlite:///{tmp_path / 'jobs.db'}")
+        yield DatabaseLock(session_maker)
+        session_maker.reset_session()
+
+
+def test_job_lock_lease(job_lock):
+    assert job_lock.acquire("cleanup", "worker-1", 10)
+    assert not job_lock.acquire("cleanup", "worker-2", 10)
+    # The holder renews its lease.
+    assert job_lock.acquire("cleanup", "worker-1", 10)
+    # Only the holder can release it.
+    job_lock.release("cleanup", "worker-2")
+    assert not job_lock.acquire("cleanup", "worker-2", 10)
+    job_lock.release("cleanup", "worker-1")
+    assert job_lock.acquire("cleanup", "worker-2", 10)
+
+
+def test_file_lock_is_private(tmp_path):
+    lock = FileLock(str(tmp_path / "jobs.lock"))
+    assert lock.acquire("cleanup", "worker-1", 10)
+    assert os.stat(lock.path).st_mode & 0o777 == 0o600
+
+
+def test_job_lock_expiry(job_lock):
+    assert job_lock.acquire("report", "worker-1", 0.05)
+    assert not job_lock.acquire("report", "worker-2", 10)
+    time.sleep(0.1)
+    # A lease that was not renewed can be taken over.
+    assert job_lock.acquire("report", "worker-2", 10)
+    assert not job_lock.acquire("report", "worker-1", 10)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_job_lock(tmp_path):
+    lock = FileLock(str(tmp_path / "jobs.lock"))
+    assert lock.acquire("elsewhere", "another-host:1", 10)
+    scheduler = Scheduler()
+    calls = []
+    scheduler.add_job(lambda: calls.append("mine"), seconds=0.05, name="mine", lock=lock)
+    scheduler.add_job(lambda: calls.append("other"), seconds=0.05, name="elsewhere", lock=lock)
+
+    async with scheduler:
+        await asyncio.sleep(0.12)
+        stats = scheduler.stats()
+
+    assert "other" not in calls
+    assert stats["elsewhere"]["not_leader"] >= 2
+    assert stats["mine"]["runs"] >= 2
+    # The lease is released on shutdown.
+    assert lock.acquire("mine", "another-host:1", 10)
+
+
+def test_repeat_every_lock_across_processes(tmp_path):
+    script = textwrap.dedent(
+        f"""
+        import asyncio, os
+        from fastapi_utilities import repeat_every
+        from fastapi_utilities.repeat import FileLock
+
+        @repeat_every(seconds=0.05, lock=FileLock({str(tmp_path / "jobs.lock")!r}), lock_ttl=5)
+        def job():
+            with open({str(tmp_path / "runs")!r}, "a") as runs:
+                runs.write(f"{{os.getpid()}}\\n")
+
+        async def main():
+            await job()
+            await asyncio.sleep(0.6)
+
+        asyncio.run(main())
+        """
+    )
+    workers = [subprocess.Popen([sys.executable, "-c", script]) for _ in range(3)]
+    for worker in workers:
+        assert worker.wait(timeout=30) == 0
+
+    runs = (tmp_path / "runs").read_text().split()
+    assert len(runs) >= 5
+    # Every tick ran in a single worker.
+    assert len(set(runs)) == 1
+
+
+def test_lock_owner():
+    assert lock_owner().endswith(f":{os.getpid()}")
+
+
+@pytest.mark.asyncio
+async def test_lock_ttl_only_checked_with_a_lock(tmp_path):
+    calls = []
+
+    # Without a lock, the lease duration derived from the interval is not used.
+    @repeat_every(seconds=0, max_repetitions=2)
+    def job():
+        calls.append(1)
+
+    await job()
+    await asyncio.sleep(0.05)
+    assert calls == [1, 1]
+
+    scheduler = Scheduler()
+    scheduler.add_job(lambda: None, seconds=0, name="no-lock")
+    lock = FileLock(str(tmp_path / "jobs.lock"))
+    # An explicit lock_ttl of 0 is not replaced by the default.
+    with pytest.raises(ValueError):
+        scheduler.add_job(lambda: None, seconds=1, name="locked", lock=lock, lock_ttl=0)
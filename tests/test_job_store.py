@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from fastapi_utilities import FastAPISessionMaker, Scheduler, repeat_at
+from fastapi_utilities.repeat import JobState, JobStore
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    session_maker = FastAPISessionMaker(f"sqlite:///{tmp_path / 'jobs.db'}")
+    yield JobStore(session_maker, flush_interval=0.01)
+    session_maker.reset_session()
+
+
+def test_job_store_load_and_save(store):
+    assert store.load(["a", "b"]) == {}
+    store.save({"a": JobState(1.0, 1), "b": JobState(2.0, 2)})
+    store.save({"a": JobState(3.0, 2)})
+    assert store.load(["a", "b", "c"]) == {"a": JobState(3.0, 2), "b": JobState(2.0, 2)}
+
+
+@pytest.mark.asyncio
+async def test_job_store_batches(store, monkeypatch):
+    store.save({f"job-{i}": JobState(float(i), i) for i in range(1200)})
+    loads = []
+    load = store.load
+    monkeypatch.setattr(store, "load", lambda names: loads.append(len(names)) or load(names))
+
+    states = await asyncio.gather(*(store.get(f"job-{i}") for i in range(1201)))
+    assert loads == [1201]
+    assert states[1199] == JobState(1199.0, 1199)
+    assert states[1200] is None
+
+    saves = []
+    save = store.save
+    monkeypatch.setattr(store, "save", lambda states: saves.append(len(states)) or save(states))
+    for i in range(100):
+        store.record(f"new-{i}", 1.0, 1)
+    await asyncio.sleep(0.1)
+    assert saves == [100]
+    assert store.load(["new-99"]) == {"new-99": JobState(1.0, 1)}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("misfire, expected", [("run_once", 1), ("run_all", 3), ("skip", 0)])
+async def test_repeat_at_misfire(store, misfire, expected):
+    calls = []
+    # The app was down for the last three minutes.
+    store.save({"missed": JobState(time.time() - 180, 5)})
+    scheduler = Scheduler(store=store)
+    scheduler.add_job(lambda: calls.append(1), cron="* * * * *", name="missed", misfire=misfire)
+
+    async with scheduler:
+        await asyncio.sleep(0.1)
+
+    assert len(calls) == expected
+    assert scheduler.get_job("missed").ticks == 5 + expected
+    if expected:
+        assert store.load(["missed"])["missed"].runs == 5 + expected
+
+
+@pytest.mark.asyncio
+async def test_repeat_at_store_max_repetitions(store):
+    calls = []
+    store.save({f"{__name__}.done": JobState(time.time() - 180, 3)})
+
+    async def done():
+        calls.append(1)
+
+    done.__qualname__ = "done"
+    task = asyncio.ensure_future(repeat_at(cron="* * * * *", store=store, max_repetitions=3)(done)())
+    await asyncio.wait_for(task, 1)
+    assert calls == []
+
+    with pytest.raises(ValueError):
+        repeat_at(cron="* * * * *", misfire="sometimes")
+
+
+@pytest.mark.asyncio
+async def test_repeat_at_catch_up(store):
+    calls = []
+
+    def report():
+        calls.append(1)
+
+    store.save({f"{__name__}.report": JobState(time.time() - 120, 1)})
+    report.__qualname__ = "report"
+    repeat_at(cron="* * * * *", store=store, misfire="run_all")(report)()
+    await asyncio.sleep(0.2)
+    assert len(calls) == 2
+    assert store.load([f"{__name__}.report"])[f"{__name__}.report"].runs == 3
@@ -0,0 +1,78 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import fastapi_utilities
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ["sqlalchemy", "croniter", "fastapi", "starlette"]
+
+
+def run_python(code: str):
+    """
+    Run `code` in a fresh interpreter with `-X importtime`, and return the JSON it prints
+    and the cumulative import time of every module in µs.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                import_times[module.strip()] = int(cumulative)
+    return json.loads(result.stdout), import_times
+
+
+def loaded_after(statement: str):
+    return run_python(
+        f"import json, sys\n{statement}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+
+
+def test_import_does_not_load_dependencies():
+    loaded, import_times = loaded_after("import fastapi_utilities")
+    assert loaded == []
+    # Importing everything eagerly took hundreds of milliseconds.
+    assert import_times["fastapi_utilities"] < 100000
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        ("from fastapi_utilities import ttl_lru_cache", []),
+        ("from fastapi_utilities import repeat_every, repeat_at, Scheduler", []),
+        ("from fastapi_utilities.timer import timed", []),
+        ("from fastapi_utilities import add_timer_middleware", ["fastapi", "starlette"]),
+        ("from fastapi_utilities import FastAPISessionMaker", ["sqlalchemy"]),
+    ],
+)
+def test_names_only_load_their_dependencies(statement, expected):
+    loaded, _ = loaded_after(statement)
+    assert loaded == expected
+
+
+def test_lazy_names():
+    from fastapi_utilities import cache, repeat, session, timer
+
+    assert fastapi_utilities.ttl_lru_cache is cache.ttl_lru_cache
+    assert fastapi_utilities.add_cache_middleware is cache.add_cache_middleware
+    assert fastapi_utilities.repeat_every is repeat.repeat_every
+    assert fastapi_utilities.Scheduler is repeat.Scheduler
+    assert fastapi_utilities.FastAPISessionMaker is session.FastAPISessionMaker
+    assert fastapi_utilities.add_timer_middleware is timer.add_timer_middleware
+    assert set(fastapi_utilities.__all__) <= set(dir(fastapi_utilities))
+    for name in fastapi_utilities.__all__:
+        assert callable(getattr(fastapi_utilities, name))
+
+    with pytest.raises(AttributeError):
+        fastapi_utilities.missing
@@ -1,10 +1,16 @@
 import logging
 import pytest
 import asyncio
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
 
 from _pytest.capture import CaptureFixture
 from _pytest.logging import LogCaptureFixture
-from fastapi_utilities import repeat_every
+from fastapi_utilities import Scheduler, repeat_every
+from fastapi_utilities.repeat import set_max_concurrent_jobs
+from fastapi_utilities.repeat.runner import _job_limiter
 
 
 @pytest.mark.asyncio
@@ -108,3 +114,105 @@ async def test_repeat_raise_error(capsys: CaptureFixture[str]) -> None:
     out, err = capsys.readouterr()
     assert out == ""
     assert err == ""
+
+
+@pytest.mark.asyncio
+async def test_repeat_every_fixed_rate() -> None:
+    loop = asyncio.get_running_loop()
+    runs = []
+
+    @repeat_every(seconds=0.1, fixed_rate=True, max_repetitions=4)
+    async def slow_task():
+        runs.append(loop.time())
+        await asyncio.sleep(0.05)
+
+    await slow_task()
+    await asyncio.sleep(0.45)
+    assert len(runs) == 4
+    # Each run is due 0.1 s after the previous one, not 0.1 s after it finished.
+    assert runs[3] - runs[0] == pytest.approx(0.3, abs=0.04)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "on_missed, expected",
+    [
+        ("skip", [0, 0.3, 0.4, 0.5]),
+        ("coalesce", [0, 0.25, 0.3, 0.4]),
+        ("catch_up", [0, 0.25, 0.25, 0.3]),
+    ],
+)
+async def test_repeat_every_missed_ticks(on_missed: str, expected: list) -> None:
+    loop = asyncio.get_running_loop()
+    runs = []
+
+    @repeat_every(seconds=0.1, fixed_rate=True, on_missed=on_missed, max_repetitions=4)
+    async def task():
+        runs.append(loop.time())
+        if len(runs) == 1:
+            await asyncio.sleep(0.25)
+
+    await task()
+    await asyncio.sleep(0.6)
+    assert [run - runs[0] for run in runs] == pytest.approx(expected, abs=0.04)
+
+
+def test_repeat_every_invalid_policy() -> None:
+    with pytest.raises(ValueError):
+        repeat_every(seconds=1, on_missed="later")
+    # A fixed rate of 0 seconds would divide by zero once a tick is missed.
+    with pytest.raises(ValueError):
+        repeat_every(seconds=0, fixed_rate=True)
+    with pytest.raises(ValueError):
+        Scheduler().add_job(lambda: None, seconds=0, fixed_rate=True)
+
+
+@pytest.mark.asyncio
+async def test_repeat_every_max_instances(caplog: LogCaptureFixture) -> None:
+    running = []
+    peak = []
+
+    @repeat_every(
+        seconds=0.05,
+        fixed_rate=True,
+        max_instances=2,
+        max_repetitions=6,
+        logger=logging.getLogger("test"),
+    )
+    async def overlapping():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.12)
+        running.pop()
+
+    await overlapping()
+    await asyncio.sleep(0.5)
+    assert max(peak) == 2
+    assert any("Skipping a run" in record.getMessage() for record in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_repeat_every_executor_and_concurrency_cap() -> None:
+    threads = set()
+    running = []
+    peak = []
+
+    def work():
+        threads.add(threading.current_thread().name)
+        running.append(1)
+        peak.append(len(running))
+        time.sleep(0.05)
+        running.pop()
+
+    set_max_concurrent_jobs(1)
+    try:
+        with ThreadPoolExecutor(thread_name_prefix="jobs") as executor:
+            for _ in range(3):
+                await repeat_every(seconds=0.01, max_repetitions=2, executor=executor)(work)()
+            await asyncio.sleep(0.5)
+    finally:
+        set_max_concurrent_jobs(None)
+    assert _job_limiter().total_tokens == 40
+    assert len(peak) == 6
+    assert max(peak) == 1
+    assert all(name.startswith("jobs") for name in threads)
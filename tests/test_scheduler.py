@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import pytest
+
+from datetime import datetime, timezone
+
+from fastapi_utilities import Scheduler, repeat_at, repeat_every
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_jobs():
+    scheduler = Scheduler()
+    calls = []
+
+    @repeat_every(seconds=0.05, max_repetitions=3, scheduler=scheduler)
+    async def fast():
+        calls.append("fast")
+
+    @repeat_every(seconds=0.1, wait_first=True, scheduler=scheduler)
+    def slow():
+        calls.append("slow")
+
+    # The decorated functions are left unchanged.
+    await fast()
+    assert calls == ["fast"]
+    calls.clear()
+
+    async with scheduler:
+        await asyncio.sleep(0.27)
+        stats = scheduler.stats()
+
+    assert calls.count("fast") == 3
+    assert calls.count("slow") == 2
+    assert stats[f"{__name__}.test_scheduler_runs_jobs.<locals>.fast"]["runs"] == 3
+    slow_stats = stats[f"{__name__}.test_scheduler_runs_jobs.<locals>.slow"]
+    assert slow_stats["runs"] == 2
+    assert slow_stats["next_run_at"] is not None
+    assert slow_stats["last_duration"] is not None
+
+
+@pytest.mark.asyncio
+async def test_scheduler_add_and_remove_jobs():
+    scheduler = Scheduler()
+    calls = []
+    scheduler.start()
+    try:
+        scheduler.add_job(lambda: calls.append(1), seconds=0.05, name="tick")
+        with pytest.raises(ValueError):
+            scheduler.add_job(lambda: None, seconds=1, name="tick")
+        with pytest.raises(ValueError):
+            scheduler.add_job(lambda: None, cron="invalid")
+        await asyncio.sleep(0.12)
+        scheduler.remove_job("tick")
+        seen = len(calls)
+        await asyncio.sleep(0.1)
+    finally:
+        await scheduler.shutdown()
+    assert seen >= 2
+    assert len(calls) == seen
+    assert scheduler.get_job("tick") is None
+
+
+@pytest.mark.asyncio
+async def test_scheduler_failures_and_shutdown(caplog):
+    scheduler = Scheduler(logger=logging.getLogger("test"))
+    finished = []
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def long_job():
+        await asyncio.sleep(10)
+        finished.append(True)
+
+    failing = scheduler.add_job(fail, seconds=0.05)
+    stopped = scheduler.add_job(fail, seconds=0.05, name="stopped", raise_exceptions=True)
+    scheduler.add_job(long_job, seconds=1)
+    scheduler.start()
+    await asyncio.sleep(0.12)
+
+    assert failing.runner.failures >= 2
+    assert "boom" in caplog.text
+    # With raise_exceptions, a failing job is removed.
+    assert scheduler.get_job("stopped") is None
+    assert isinstance(stopped.runner.last_error, ValueError)
+
+    await scheduler.shutdown(timeout=0.05)
+    assert not scheduler.running
+    assert finished == []
+
+
+@pytest.mark.asyncio
+async def test_scheduler_shutdown_waits_for_overlapping_runs():
+    scheduler = Scheduler()
+    started = []
+    finished = []
+
+    async def job(duration):
+        started.append(duration)
+        await asyncio.sleep(duration)
+        finished.append(duration)
+
+    scheduler.add_job(job, seconds=10, name="short", args=(0.1,), max_instances=2)
+    long_job = scheduler.add_job(job, seconds=10, name="long", args=(10,), max_instances=2)
+    scheduler.start()
+    await asyncio.sleep(0.02)
+    assert started == [0.1, 10]
+    assert long_job.runner.running == 1
+
+    await scheduler.shutdown(timeout=0.2)
+    # The short run was waited for and the long one cancelled.
+    assert finished == [0.1]
+    assert long_job.runner.running == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cron_job():
+    scheduler = Scheduler()
+
+    @repeat_at(cron="* * * * *", tz="Asia/Tokyo", scheduler=scheduler)
+    def every_minute():
+        pass
+
+    scheduler.add_job(lambda: None, seconds=10, name="interval", wait_first=True)
+
+    async with scheduler:
+        job = scheduler.jobs[0]
+        assert 0 < job.next_run - asyncio.get_running_loop().time() <= 60
+        assert job.stats()["runs"] == 0
+        # The next run is reported as the fire time, in the time zone of the job.
+        next_run_at = job.stats()["next_run_at"]
+        assert next_run_at == job.schedule.last_fire
+        assert next_run_at.tzinfo is job.schedule.tz
+        assert next_run_at.second == 0
+        interval_run_at = scheduler.get_job("interval").next_run_at
+        assert 9 < (interval_run_at - datetime.now(timezone.utc)).total_seconds() <= 10
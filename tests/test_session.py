@@ -10,7 +10,7 @@ from fastapi_utilities import FastAPISessionMaker
 # setup
 db_path = Path("./db.sqlite3")
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DB_URL = f"sqlite:///{db_path}"
@@ -57,3 +57,162 @@ def test_session_raise_error(capsys: CaptureFixture[str]) -> None:
     except Exception:
         out, err = capsys.readouterr()
         assert out == ""
+
+
+def test_session_pool_stats() -> None:
+    sm = FastAPISessionMaker(DB_URL, pool_size=2, max_overflow=0, pool_timeout=0.1)
+    assert sm.pool_stats().checkouts == 0
+
+    with sm.context_session() as session:
+        session.query(User).count()
+        stats = sm.pool_stats()
+        assert stats.checked_out == 1
+        assert stats.size == 2
+
+    stats = sm.pool_stats()
+    assert stats.checked_out == 0
+    assert stats.checkouts == 1
+    assert stats.timeouts == 0
+
+
+def test_session_pool_timeout() -> None:
+    sm = FastAPISessionMaker(DB_URL, pool_size=1, max_overflow=0, pool_timeout=0.1)
+    with sm.context_session() as first:
+        first.query(User).count()
+        with pytest.raises(exc.TimeoutError):
+            with sm.context_session() as second:
+                second.query(User).count()
+    stats = sm.pool_stats()
+    assert stats.timeouts == 1
+    assert stats.max_wait >= 0.1
+
+
+def test_session_pool_stats_in_memory() -> None:
+    # A `:memory:` database uses a SingletonThreadPool, whose `size` is not a method.
+    sm = FastAPISessionMaker("sqlite:///:memory:")
+    with sm.context_session() as session:
+        session.execute(text("SELECT 1"))
+    stats = sm.pool_stats()
+    assert stats.size == 0
+    assert stats.checkouts == 1
+
+
+def test_session_pool_stats_after_dispose() -> None:
+    sm = FastAPISessionMaker(DB_URL)
+    with sm.context_session() as session:
+        session.query(User).count()
+    sm._cached_engine.dispose()
+    for _ in range(3):
+        with sm.context_session() as session:
+            session.query(User).count()
+    stats = sm.pool_stats()
+    assert stats.checkouts == 4
+    assert stats.checked_out == 0
+
+
+def test_read_session(tmp_path) -> None:
+    replica_url = f"sqlite:///{tmp_path / 'replica.sqlite3'}"
+    Base.metadata.create_all(bind=create_engine(replica_url))
+    broken_url = f"sqlite:///{tmp_path / 'missing' / 'replica.sqlite3'}"
+
+    sm = FastAPISessionMaker(DB_URL, replica_urls=[broken_url, replica_url])
+    for _ in range(2):
+        with sm.read_session() as session:
+            assert str(session.get_bind().url) == replica_url
+            assert session.query(User).count() == 0
+
+    assert sm.check_replicas() == {broken_url: False, replica_url: True}
+
+
+def test_read_session_fallback(tmp_path) -> None:
+    broken_url = f"sqlite:///{tmp_path / 'missing' / 'replica.sqlite3'}"
+    sm = FastAPISessionMaker(DB_URL, replica_urls=[broken_url])
+    with sm.read_session() as session:
+        assert str(session.get_bind().url) == DB_URL
+
+
+class Event(Base):
+    __tablename__ = "events"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer)
+
+
+def test_bulk_insert(tmp_path) -> None:
+    url = f"sqlite:///{tmp_path / 'bulk.sqlite3'}"
+    Base.metadata.create_all(bind=create_engine(url))
+    sm = FastAPISessionMaker(url)
+
+    rows = ({"id": i, "value": i} for i in range(2500))
+    assert sm.bulk_insert(Event, rows, chunk_size=1000) == 2500
+
+    with sm.bulk_writer(Event.__table__, chunk_size=2, upsert_on=["id"]) as writer:
+        writer.add({"id": 0, "value": -1})
+        writer.add_all([{"id": 1, "value": -1}, {"id": 2500, "value": 2500}])
+        assert writer.written == 2
+
+    with sm.context_session() as session:
+        assert session.query(Event).count() == 2501
+        assert session.get(Event, 0).value == -1
+        assert session.get(Event, 1).value == -1
+
+
+def test_bulk_writer_unsupported_upsert() -> None:
+    from types import SimpleNamespace
+
+    from fastapi_utilities.session import BulkWriter
+
+    oracle = SimpleNamespace(dialect=SimpleNamespace(name="oracle"))
+    session = SimpleNamespace(get_bind=lambda: oracle)
+    BulkWriter(session, Event)
+    # Raised before any row is consumed, rather than at the first flush.
+    with pytest.raises(ValueError):
+        BulkWriter(session, Event, upsert_on=["id"])
+
+
+def test_bulk_writer_rollback(tmp_path) -> None:
+    url = f"sqlite:///{tmp_path / 'bulk.sqlite3'}"
+    Base.metadata.create_all(bind=create_engine(url))
+    sm = FastAPISessionMaker(url)
+
+    with pytest.raises(ValueError):
+        with sm.bulk_writer(Event, chunk_size=2) as writer:
+            writer.add_all({"id": i, "value": i} for i in range(3))
+            raise ValueError("rollback")
+
+    with sm.context_session() as session:
+        assert session.query(Event).count() == 0
+
+
+def test_session_init_is_thread_safe(monkeypatch) -> None:
+    import threading
+    import time
+    from fastapi_utilities.session import session as session_module
+
+    engines = []
+
+    def slow_create_engine(*args, **kwargs):
+        time.sleep(0.05)
+        engines.append(create_engine(*args, **kwargs))
+        return engines[-1]
+
+    monkeypatch.setattr(session_module, "create_engine", slow_create_engine)
+    sm = FastAPISessionMaker(DB_URL)
+    threads = [threading.Thread(target=sm._get_session_maker) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(engines) == 1
+
+
+def test_session_warm_up_and_reset() -> None:
+    sm = FastAPISessionMaker(DB_URL, pool_size=3)
+    sm.warm_up(connections=3)
+    pool = sm._cached_engine.pool
+    assert pool.checkedin() == 3
+    assert sm.pool_stats().checkouts == 3
+
+    sm.reset_session()
+    assert pool.checkedin() == 0
+    assert sm.pool_stats().checkouts == 0
@@ -1,13 +1,24 @@
 import logging
 import pytest
 import asyncio
+import pstats
+import time
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
 from _pytest.capture import CaptureFixture
+from _pytest.logging import LogCaptureFixture
 from fastapi_utilities import add_timer_middleware
+from fastapi_utilities.timer import (
+    LatencyHistogram,
+    exponential_buckets,
+    request_spans,
+    timed,
+    timing_span,
+)
 
 app = FastAPI()
-add_timer_middleware(app, show_avg=True, reset_after=1)
+metrics = add_timer_middleware(app, show_avg=True, reset_after=1, metrics_path="/metrics")
 
 
 @app.get("/")
@@ -15,6 +26,15 @@ def root():
     pass
 
 
+@app.get("/items/{item_id}")
+def item(item_id: int):
+    return {"id": item_id}
+
+
+sub_app = FastAPI()
+sub_app.add_api_route("/items/{item_id}", item)
+app.mount("/sub", sub_app)
+
 client = TestClient(app)
 
 
@@ -22,3 +42,150 @@ def test_timer_middleware(capsys: CaptureFixture[str]) -> None:
     client.get("/")
     out, err = capsys.readouterr()
     assert err == ""
+
+
+def test_timer_middleware_histograms() -> None:
+    metrics.reset()
+    for item_id in range(10):
+        client.get(f"/items/{item_id}")
+    client.get("/missing")
+    client.get("/sub/items/1")
+
+    snapshot = client.get("/metrics").json()
+    assert snapshot["GET /items/{item_id}"]["count"] == 10
+    assert snapshot["GET /sub/items/{item_id}"]["count"] == 1
+    assert snapshot["GET <unmatched>"]["count"] == 1
+    assert app.state.timer_metrics is metrics
+
+
+def test_latency_histogram() -> None:
+    histogram = LatencyHistogram(buckets=exponential_buckets(1, 2, 12))
+    for value in range(1, 101):
+        histogram.record(value)
+
+    assert histogram.count == 100
+    assert histogram.mean == 50.5
+    assert 40 <= histogram.percentile(50) <= 64
+    assert 90 <= histogram.percentile(99) <= 100
+    assert histogram.percentile(100) == 100
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+def make_client(**kwargs) -> TestClient:
+    timed_app = FastAPI()
+    add_timer_middleware(timed_app, **kwargs)
+
+    @timed_app.get("/fast")
+    def fast():
+        pass
+
+    @timed_app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    return TestClient(timed_app)
+
+
+def test_timer_middleware_sampling(caplog: LogCaptureFixture) -> None:
+    sampled_client = make_client(log_every=3)
+    with caplog.at_level(logging.INFO, logger="uvicorn"):
+        for _ in range(6):
+            sampled_client.get("/fast")
+    assert len(caplog.records) == 2
+
+
+def test_timer_middleware_slow_threshold(caplog: LogCaptureFixture) -> None:
+    slow_client = make_client(log_every=0, slow_threshold=40)
+    with caplog.at_level(logging.INFO, logger="uvicorn"):
+        slow_client.get("/fast")
+        slow_client.get("/slow")
+    assert len(caplog.records) == 1
+    assert "/slow" in caplog.records[0].getMessage()
+
+
+def test_timer_middleware_queue_logs(caplog: LogCaptureFixture) -> None:
+    queued_client = make_client(queue_logs=True)
+    with caplog.at_level(logging.INFO, logger="uvicorn"):
+        queued_client.get("/fast")
+        for _ in range(100):
+            if caplog.records:
+                break
+            time.sleep(0.01)
+    assert len(caplog.records) == 1
+
+
+def test_timer_middleware_queue_logs_level(caplog: LogCaptureFixture) -> None:
+    queued_client = make_client(queue_logs=True)
+    # The queue and its thread are shared by the middlewares logging to the same logger.
+    assert queued_client.app.user_middleware[0].kwargs["logger"] is (
+        make_client(queue_logs=True).app.user_middleware[0].kwargs["logger"]
+    )
+    with caplog.at_level(logging.WARNING, logger="uvicorn"):
+        queued_client.get("/fast")
+        time.sleep(0.1)
+    assert caplog.records == []
+
+
+def test_timer_middleware_phases(caplog: LogCaptureFixture) -> None:
+    phased_app = FastAPI()
+    phased_metrics = add_timer_middleware(phased_app)
+
+    @phased_app.get("/stream")
+    def stream():
+        def chunks():
+            time.sleep(0.02)
+            yield b"a" * 10
+            time.sleep(0.02)
+            yield b"b" * 10
+
+        return StreamingResponse(chunks())
+
+    with caplog.at_level(logging.INFO, logger="uvicorn"):
+        TestClient(phased_app).get("/stream", headers={"X-Request-Start": f"t={time.time()}"})
+
+    route = phased_metrics.route("GET /stream")
+    assert route.response_bytes == 20
+    assert route.first_byte.max >= route.handler.max + 15
+    assert route.total.max >= route.first_byte.max + 15
+    message = caplog.records[0].getMessage()
+    assert "queue" in message and "first byte" in message and "20 bytes" in message
+
+
+def test_timer_middleware_server_timing() -> None:
+    spans_app = FastAPI()
+    add_timer_middleware(spans_app, server_timing=True)
+
+    @timed("render")
+    def render():
+        time.sleep(0.01)
+        return {"ok": True}
+
+    @spans_app.get("/spans")
+    async def spans():
+        with timing_span("db"):
+            await asyncio.sleep(0.01)
+        with timing_span("db"):
+            await asyncio.sleep(0.01)
+        assert request_spans()["db"] >= 20
+        return render()
+
+    response = TestClient(spans_app).get("/spans")
+    metrics = dict(
+        metric.strip().split(";dur=") for metric in response.headers["server-timing"].split(",")
+    )
+    assert float(metrics["db"]) >= 20
+    assert float(metrics["render"]) >= 10
+    assert float(metrics["app"]) >= float(metrics["db"]) + float(metrics["render"])
+
+
+def test_timer_middleware_profiling(tmp_path) -> None:
+    profiled_client = make_client(
+        profile_dir=str(tmp_path), profile_threshold=40, profile_sample_rate=1
+    )
+    profiled_client.get("/fast")
+    assert list(tmp_path.iterdir()) == []
+    profiled_client.get("/slow")
+    profiles = list(tmp_path.iterdir())
+    assert len(profiles) == 1
+    assert "GET-slow" in profiles[0].name
+    assert pstats.Stats(str(profiles[0])).total_calls > 0
@@ -0,0 +1,395 @@
+import asyncio
+import os
+import stat
+import time
+import pytest
+
+from fastapi_utilities import ttl_lru_cache
+from fastapi_utilities.cache import (
+    SharedMemoryBackend,
+    SQLiteBackend,
+    TTLCache,
+    estimate_size,
+)
+
+
+def test_ttl_lru_cache():
+    """
+    Simple Test Case for ttl_lru_cache
+    """
+    calls = []
+
+    @ttl_lru_cache(ttl=60, max_size=128)
+    def add(a: int, b: int) -> int:
+        calls.append((a, b))
+        return a + b
+
+    assert add(1, 3) == 4
+    assert add(1, 3) == 4
+    assert calls == [(1, 3)]
+
+    add.cache_clear()
+    assert add(1, 3) == 4
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_lru_cache_async():
+    """
+    Test Case for ttl_lru_cache on a coroutine function
+    """
+    calls = []
+
+    @ttl_lru_cache(ttl=60, max_size=128)
+    async def add(a: int, b: int) -> int:
+        calls.append((a, b))
+        return a + b
+
+    assert await add(1, 3) == 4
+    assert await add(1, 3) == 4
+    assert await add(a=1, b=3) == 4
+    assert calls == [(1, 3), (1, 3)]
+
+
+@pytest.mark.asyncio
+async def test_ttl_lru_cache_async_single_flight():
+    """
+    Test Case for concurrent misses on the same key sharing one call
+    """
+    calls = 0
+
+    @ttl_lru_cache(ttl=60)
+    async def fetch(key: str) -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return key.upper()
+
+    results = await asyncio.gather(*(fetch("a") for _ in range(500)))
+    assert results == ["A"] * 500
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_lru_cache_async_exception_not_cached():
+    """
+    Test Case for exceptions raised by a coroutine function not being cached
+    """
+    calls = 0
+
+    @ttl_lru_cache(ttl=60)
+    async def flaky() -> int:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ValueError("flaky")
+        return calls
+
+    with pytest.raises(ValueError):
+        await flaky()
+    assert await flaky() == 2
+    assert await flaky() == 2
+
+
+def test_ttl_lru_cache_per_entry_expiry():
+    """
+    Test Case for entries expiring `ttl` seconds after they were stored
+    """
+    calls = []
+
+    @ttl_lru_cache(ttl=0.3)
+    def identity(x: int) -> int:
+        calls.append(x)
+        return x
+
+    identity(1)
+    time.sleep(0.15)
+    identity(2)
+    time.sleep(0.2)
+    identity(1)
+    identity(2)
+    assert calls == [1, 2, 1]
+
+
+def test_ttl_lru_cache_max_size():
+    """
+    Test Case for least recently used entries being evicted
+    """
+    calls = []
+
+    @ttl_lru_cache(ttl=60, max_size=2)
+    def identity(x: int) -> int:
+        calls.append(x)
+        return x
+
+    identity(1)
+    identity(2)
+    identity(1)
+    identity(3)
+    identity(1)
+    identity(2)
+    assert calls == [1, 2, 3, 2]
+
+
+def test_ttl_lru_cache_invalid_jitter():
+    """
+    Test Case for ttl_lru_cache with an invalid ttl_jitter
+    """
+    with pytest.raises(ValueError):
+        ttl_lru_cache(ttl=60, ttl_jitter=1.5)
+
+
+def test_ttl_cache():
+    """
+    Test Case for TTLCache dropping expired entries lazily
+    """
+    cache = TTLCache(max_size=None)
+    now = time.time()
+    cache.set("fresh", 1, now + 60)
+    cache.set("expired", 2, now - 1)
+
+    assert len(cache) == 2
+    assert cache.get("fresh").value == 1
+    assert cache.get("expired") is None
+    assert len(cache) == 1
+
+    cache.set("expired", 2, now - 1)
+    assert cache.expire() == 1
+    assert "fresh" in cache
+
+
+def test_ttl_lru_cache_stale_while_revalidate():
+    """
+    Test Case for stale entries being served while they are refreshed in the background
+    """
+    calls = []
+
+    @ttl_lru_cache(ttl=0.1, stale_ttl=60)
+    def version() -> int:
+        calls.append(None)
+        time.sleep(0.05)
+        return len(calls)
+
+    assert version() == 1
+    time.sleep(0.15)
+    assert version() == 1
+    assert version() == 1
+    time.sleep(0.1)
+    assert version() == 2
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_lru_cache_async_stale_while_revalidate():
+    """
+    Test Case for stale entries of a coroutine function being refreshed in a task
+    """
+    calls = 0
+
+    @ttl_lru_cache(ttl=0.1, stale_ttl=60)
+    async def version() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    assert await version() == 1
+    await asyncio.sleep(0.15)
+    assert await asyncio.gather(version(), version()) == [1, 1]
+    await asyncio.sleep(0.1)
+    assert await version() == 2
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_lru_cache_failed_refresh(caplog):
+    """
+    Test Case for failed background refreshes being logged and counted
+    """
+    events = []
+    failing = False
+
+    @ttl_lru_cache(ttl=0.05, stale_ttl=60, stats_hook=lambda e, v: events.append(e))
+    def sync_version() -> int:
+        if failing:
+            raise RuntimeError("backend down")
+        return 1
+
+    @ttl_lru_cache(ttl=0.05, stale_ttl=60)
+    async def async_version() -> int:
+        if failing:
+            raise RuntimeError("backend down")
+        return 1
+
+    assert sync_version() == 1
+    assert await async_version() == 1
+    failing = True
+    await asyncio.sleep(0.1)
+    assert sync_version() == 1
+    assert await async_version() == 1
+    await asyncio.sleep(0.1)
+
+    assert sync_version.cache_info().refresh_errors == 1
+    assert async_version.cache_info().refresh_errors == 1
+    assert "refresh_error" in events
+    assert [record.exc_info[1].args for record in caplog.records] == [("backend down",)] * 2
+
+
+def test_ttl_lru_cache_info():
+    """
+    Test Case for the statistics reported by cache_info and stats_hook
+    """
+    events = []
+
+    @ttl_lru_cache(ttl=0.1, max_size=1, stats_hook=lambda e, v: events.append(e))
+    def identity(x: int) -> int:
+        return x
+
+    identity(1)
+    identity(1)
+    identity(2)
+    time.sleep(0.15)
+    identity(2)
+
+    info = identity.cache_info()
+    assert info.hits == 1
+    assert info.misses == 3
+    assert info.expirations == 1
+    assert info.evictions == 1
+    assert info.loads == 3
+    assert info.currsize == 1
+    assert info.maxsize == 1
+    # Values are only sized with max_bytes.
+    assert info.memory == 0
+    assert info.hit_rate == 0.25
+    assert events.count("hit") == 1
+    assert events.count("load") == 3
+
+    identity.cache_clear()
+    assert identity.cache_info().hits == 0
+
+
+def test_ttl_lru_cache_max_bytes():
+    """
+    Test Case for entries being evicted to stay within max_bytes
+    """
+
+    @ttl_lru_cache(ttl=60, max_size=None, max_bytes=1000, size_of=len)
+    def payload(n: int) -> bytes:
+        return b"x" * n
+
+    payload(400)
+    payload(500)
+    assert payload.cache_info().memory == 900
+    payload(300)
+    info = payload.cache_info()
+    assert info.currsize == 2
+    assert info.memory == 800
+    assert info.evictions == 1
+
+    payload(2000)
+    assert payload.cache_info().currsize == 2
+
+
+def test_estimate_size():
+    """
+    Test Case for the recursive size estimate
+    """
+    row = {"name": "x" * 1000}
+    assert estimate_size(row) > 1000
+    assert estimate_size([row, row]) < 2 * estimate_size(row)
+
+    deep = []
+    for _ in range(5000):
+        deep = [deep]
+    assert 0 < estimate_size(deep) < estimate_size(deep, max_depth=10000)
+    assert estimate_size(list(range(1000)), max_objects=10) < estimate_size(list(range(1000)))
+
+    @ttl_lru_cache(ttl=60, size_of=lambda value: 1 / 0)
+    def unsized(x: int) -> int:
+        return x
+
+    # Without max_bytes, values are not sized.
+    assert unsized(1) == 1
+
+
+def test_ttl_lru_cache_sqlite_backend(tmp_path):
+    """
+    Test Case for values being shared through a SQLiteBackend
+    """
+    path = str(tmp_path / "cache.sqlite3")
+    calls = []
+
+    def add(a: int, b: int) -> int:
+        calls.append((a, b))
+        return a + b
+
+    worker_1 = ttl_lru_cache(ttl=60, backend=SQLiteBackend(path))(add)
+    worker_2 = ttl_lru_cache(ttl=60, backend=SQLiteBackend(path))(add)
+
+    assert worker_1(1, b=3) == 4
+    assert worker_2(1, b=3) == 4
+    assert calls == [(1, 3)]
+    assert worker_2.cache_info().hits == 1
+    assert worker_2.cache_info().currsize == 1
+
+
+def test_sqlite_backend_expiry_and_eviction(tmp_path):
+    """
+    Test Case for SQLiteBackend dropping expired entries and evicting past max_size
+    """
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_size=2)
+    now = time.time()
+    backend.set("a", [1, 2, 3], now - 1)
+    assert backend.get("a") is None
+    backend.set("a", 1, now + 10)
+    backend.set("b", 2, now + 20)
+    backend.set("c", 3, now + 30)
+    assert backend.get("a") is None
+    assert backend.get("c").value == 3
+    assert backend.pop("b").value == 2
+    assert len(backend) == 1
+
+    info = backend.info()
+    assert info.expirations == 1
+    assert info.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_lru_cache_shared_memory_backend(tmp_path):
+    """
+    Test Case for ttl_lru_cache on a coroutine function with a SharedMemoryBackend
+    """
+    backend = SharedMemoryBackend(name="fastapi-utilities-test", directory=str(tmp_path))
+
+    @ttl_lru_cache(ttl=60, backend=backend)
+    async def add(a: int, b: int) -> int:
+        return a + b
+
+    assert await add(1, 3) == 4
+    assert await add(1, 3) == 4
+    assert add.cache_info().hits == 1
+    assert add.cache_info().maxsize == 10000
+    assert stat.S_IMODE(os.stat(os.path.dirname(backend.path)).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(backend.path).st_mode) == 0o600
+
+    with pytest.raises(ValueError):
+        ttl_lru_cache(ttl=60, max_size=10, backend=backend)
+    with pytest.raises(ValueError):
+        ttl_lru_cache(ttl=60, max_bytes=1000, backend=backend)
+
+
+def test_sqlite_backend_expire_interval_and_owner(tmp_path):
+    """
+    Test Case for SQLiteBackend sweeping expired entries and refusing unsafe files
+    """
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), expire_interval=0)
+    now = time.time()
+    backend.set("a", 1, now - 1)
+    backend.set("b", 2, now + 60)
+    assert len(backend) == 1
+    assert backend.info().expirations == 1
+
+    os.symlink(backend.path, tmp_path / "link.sqlite3")
+    with pytest.raises(PermissionError):
+        SQLiteBackend(str(tmp_path / "link.sqlite3"))